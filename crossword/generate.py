@@ -1,3 +1,4 @@
+import collections
 import sys
 import random
 from crossword import *
@@ -16,6 +17,26 @@ class CrosswordCreator():
             var: self.crossword.words.copy()# var1: {w1,w2,w3,w4}, var2: {w1,w2,w3,w4}, var3: {w1,w2,w3,w4}
             for var in self.crossword.variables# self.domains.var = var1, self.domain.words = {w1,w2,w3,w4}
         }
+        self.neighbors = {var: self.crossword.neighbors(var) for var in self.crossword.variables}
+        self.same_length = {
+            var: [other for other in self.crossword.variables if other != var and other.length == var.length]
+            for var in self.crossword.variables
+        }
+
+        #words of every length used in the puzzle get ids, and for each (position, letter)
+        #the words of that length with that letter there make up a bitset of their ids
+        self.words_of_length = dict()
+        self.word_ids = dict()
+        self.letter_index = dict()
+        for length in {var.length for var in self.crossword.variables}:
+            words = sorted(word for word in self.crossword.words if len(word) == length)
+            self.words_of_length[length] = words
+            self.word_ids[length] = {word: n for n, word in enumerate(words)}
+            index = dict()
+            for n, word in enumerate(words):
+                for position, letter in enumerate(word):
+                    index[position, letter] = index.get((position, letter), 0) | 1 << n
+            self.letter_index[length] = index
 
     def letter_grid(self, assignment):
         """
@@ -87,14 +108,20 @@ class CrosswordCreator():
 
         img.save(filename)
 
-    def solve(self):
+    def solve(self, method="trail", inference="mac"):
         """
         Enforce node and arc consistency, and then solve the CSP.
+        `method` is "trail" to search with `backtrack_trail` using
+        `inference`, or "backtrack" to search with `backtrack`.
         """
         #enfornce node consistency: ensures that all values in variable domain satisfies unary constraints
         self.enforce_node_consistency()
         self.ac3() #ac3 ensures that all values i variable satisfies binary constraints
-        return self.backtrack(dict()) #runs backtracking search algorithm on assigment and finds the solution
+        if method == "backtrack":
+            return self.backtrack(dict()) #runs backtracking search algorithm on assigment and finds the solution
+
+        bitsets = {var: self.to_bitset(var, words) for var, words in self.domains.items()}
+        return self.backtrack_trail(dict(), bitsets, [], inference)
 
     def enforce_node_consistency(self): #TODO CHECK
         """
@@ -129,109 +156,120 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        #
-
-
-
-        change = False
-        #lap[x,y] indexes of x and y where they both overlap with each other
-        lap = self.crossword.overlaps[x,y]
-        #iterating through all the values in x and y domain
-        if lap:
-            val = []
-            for x_val in self.domains[x]: #goes through values of the domain of x
-                truth_table = []
-                for y_val in self.domains[y]:
-                    #if overlapping index of word in x domain is not the same as overlapping index of word in y, append False
-                    if x_val[lap[0]] != y_val[lap[1]]:
-                        truth_table.append(False)
-                    else:
-                        truth_table.append(True)
-
-            #truth table contains True if x domain value is consistent with at least one of the y domain value
-                if not any(truth_table):
-                    val.append(x_val)
-                    change = True
-
-            for value in val:
-                self.domains[x].remove(value)
-
-            return change
+        if not self.crossword.overlaps[x, y]:
+            return False
 
-        return False
+        bitsets = {var: self.to_bitset(var, self.domains[var]) for var in (x, y)}
+        if not self.revise_bitsets(bitsets, x, y, dict()):
+            return False
+        self.domains[x] = self.from_bitset(x, bitsets[x])
+        return True
 
     def ac3(self, arcs=None):
         """
         Update `self.domains` such that each variable is arc consistent.
         If `arcs` is None, begin with initial list of all arcs in the problem.
-        Otherwise, use `arcs` as the initial list of arcs to make consistent.
+        Otherwise, use `arcs` as the initial list of arcs to make consistent;
+        an empty list means there is nothing to check, so the domains are
+        left as they are (only None checks every arc).
 
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
         """
+        #the work is done on bitsets of word ids, written back to the sets afterwards
+        bitsets = {var: self.to_bitset(var, words) for var, words in self.domains.items()}
+        consistent = self.ac3_bitsets(bitsets, arcs)
 
-        #function revsie takes only variables names, so queue items should only
-        #be variable names
-        queue = []
-        #apppend all the arc to the queue
+        for var, bits in bitsets.items():
+            if bits != self.to_bitset(var, self.domains[var]):
+                self.domains[var] = self.from_bitset(var, bits)
+        return consistent
 
-        if not arcs:
-            for var in self.domains:
-                for neighbor in self.crossword.neighbors(var):
-                    if self.crossword.overlaps[var,neighbor] is not None:
-                        queue.append(var)
-                        queue.append(neighbor)
+    def ac3_bitsets(self, bitsets, arcs=None, trail=None):
+        """
+        Like `ac3`, on domains given as `bitsets`, a dictionary mapping each
+        variable to the bitset of the ids of its words, which is updated
+        in place. Old domains are appended to `trail` (see
+        `backtrack_trail`) when given.
+        """
+        if arcs is None:
+            arcs = [(x, y) for x in bitsets for y in self.neighbors[x]]
+        queue = collections.deque(arcs)
+        queued = set(queue) #arcs already waiting in the queue are not added twice
 
+        #letters still supported at the overlap of every arc, as domains only shrink here
+        supports = dict()
 
-        #self.crossword.neighbour(x) return only names of neighbouring variables without its values
         while queue:
-            #get first two value of the queue and check arc consistency between them
-
-            if len(queue) >= 2:
-                x,y = queue.pop(0), queue.pop(0)
-                if x != y:
-
-                    revised = self.revise(x,y) #returns True if changes were made, False if not
-                    if revised:
-                        if not self.domains[x]: #if variables have no values, then arc consistency cant be kept, so return False
-                            return False
-                        #if changes was made, add element neighbours to the queue
-
-                        neighbors = self.crossword.neighbors(x)
-
-                        neighbors.remove(y)
-                        for element in neighbors:
-                            queue.append(element) #appends only variable name without its values
-                            queue.append(x)
-                else: #if queue first element is assigment last element then same elements gets added to prevent errors,move values by one element
-                    next = queue.pop(0)
-                    y_cop = copy.deepcopy(y)
-                    x = y_cop
-                    y = next
-
-                    revised = self.revise(x, y)  # returns True if changes were made, False if not
-                    if revised:
-                        if not self.domains[x]:  # if variables have no values, then arc consistency cant be kept, so return False
-                            return False
-                            # if changes was made, add element neighbours to the queue
-
-                        neighbors = self.crossword.neighbors(x)
-
-                        neighbors.remove(y)
-                        for element in neighbors:
-                            queue.append(element)  # appends only variable name without its values
-                            queue.append(x)
-
-
-            else: #if queue contains one element,then add x, along with it neighbour(even number)
-                neighbors = self.crossword.neighbors(x)
-                for element in neighbors:
-                    queue.append(element)
-                    queue.append(x)
-                queue.pop(0) # remove first element(x), to make queue even
+            x, y = queue.popleft()
+            queued.discard((x, y))
+            if self.revise_bitsets(bitsets, x, y, supports, trail):
+                if not bitsets[x]: #if variables have no values, then arc consistency cant be kept, so return False
+                    return False
+                #words of x were removed, so the other neighbours of x have to be checked again
+                for z in self.neighbors[x]:
+                    if z != y and (z, x) not in queued:
+                        queue.append((z, x))
+                        queued.add((z, x))
+        return True
 
+    def revise_bitsets(self, bitsets, x, y, supports, trail=None):
+        """
+        Like `revise`, on domains given as `bitsets` (see `ac3_bitsets`).
+
+        `supports` maps each arc (x, y) already revised to the letters at
+        the overlap of `x` that some word of `y` still had then. Only those
+        letters are checked again, each with one AND of the domain of `y`
+        and the bitset of words with that letter at the overlap; the words
+        of `x` with a letter that lost its support are removed all at once,
+        and the old domain is appended to `trail` when given.
+        """
+        i, j = self.crossword.overlaps[x, y]
+        index_x = self.letter_index[x.length]
+        index_y = self.letter_index[y.length]
+
+        if (x, y) not in supports:
+            supports[x, y] = {letter for position, letter in index_x if position == i}
+        letters = supports[x, y]
+
+        lost = [letter for letter in letters if not bitsets[y] & index_y.get((j, letter), 0)]
+        if not lost:
+            return False
+
+        removed = 0
+        for letter in lost:
+            letters.remove(letter)
+            removed |= index_x[i, letter]
+        if not bitsets[x] & removed:
+            return False
+        if trail is not None:
+            trail.append((x, bitsets[x]))
+        bitsets[x] &= ~removed
         return True
 
+    def to_bitset(self, var, words):
+        """
+        Return the bitset of the ids of `words`, as values of `var`.
+        Words that are not of the length of `var` are left out.
+        """
+        ids = self.word_ids[var.length]
+        bits = 0
+        for word in words:
+            if word in ids:
+                bits |= 1 << ids[word]
+        return bits
+
+    def from_bitset(self, var, bits):
+        """
+        Return the set of words of `var` whose ids are in bitset `bits`.
+        """
+        words = self.words_of_length[var.length]
+        values = set()
+        while bits:
+            low = bits & -bits
+            values.add(words[low.bit_length() - 1])
+            bits ^= low
+        return values
 
     def assignment_complete(self, assignment):
         """
@@ -379,6 +417,99 @@ class CrosswordCreator():
             del assignment[var]
         return False
 
+    def backtrack_trail(self, assignment, bitsets, trail, inference="mac"):
+        """
+        Like `backtrack`, with the domains of all variables given as
+        `bitsets` (see `ac3_bitsets`), pruned after every assignment by
+        `inference`: "forward" for forward checking or "mac" to maintain arc
+        consistency. Pruned domains are recorded on `trail`, a list of
+        (variable, old bitset) pairs, and put back from it when a value
+        fails, so nothing is copied.
+
+        Return a complete assignment if possible, or None.
+        """
+        if len(assignment) == len(bitsets):
+            return assignment
+
+        #minimum remaining values, then highest degree
+        var = min(
+            (v for v in bitsets if v not in assignment),
+            key=lambda v: (bitsets[v].bit_count(), -len(self.neighbors[v]))
+        )
+        words = self.words_of_length[var.length]
+
+        values = bitsets[var]
+        while values:
+            bit = values & -values
+            values ^= bit
+            word = words[bit.bit_length() - 1]
+            if not self.consistent_value(assignment, var, word):
+                continue
+
+            mark = len(trail)
+            assignment[var] = word
+            trail.append((var, bitsets[var]))
+            bitsets[var] = bit
+            if self.infer(assignment, bitsets, var, trail, inference):
+                result = self.backtrack_trail(assignment, bitsets, trail, inference)
+                if result is not None:
+                    return result
+
+            #undo everything pruned since the value was assigned
+            while len(trail) > mark:
+                variable, bits = trail.pop()
+                bitsets[variable] = bits
+            del assignment[var]
+
+        return None
+
+    def consistent_value(self, assignment, var, value):
+        """
+        Return True if assigning `value` to `var` keeps the consistent
+        `assignment` consistent: `value` is not used yet and agrees with
+        the words of the assigned neighbours of `var`.
+        """
+        if value in assignment.values():
+            return False
+        for neighbor in self.neighbors[var]:
+            if neighbor in assignment:
+                i, j = self.crossword.overlaps[var, neighbor]
+                if value[i] != assignment[neighbor][j]:
+                    return False
+        return True
+
+    def infer(self, assignment, bitsets, var, trail, inference):
+        """
+        Prune `bitsets` after `var` was assigned the only word left in its
+        domain, recording the changes on `trail` (see `backtrack_trail`).
+
+        The word is removed from the domains of the other unassigned
+        variables, then the domains of the unassigned neighbours of `var`
+        are revised against it ("forward"), or arc consistency is restored
+        starting from those arcs and the arcs into the variables that lost
+        the word ("mac"). Return False if a domain ends up empty.
+        """
+        bit = bitsets[var]
+        changed = [var]
+        for other in self.same_length[var]:
+            if other not in assignment and bitsets[other] & bit:
+                trail.append((other, bitsets[other]))
+                bitsets[other] &= ~bit
+                if not bitsets[other]:
+                    return False
+                changed.append(other)
+
+        if inference == "forward":
+            for neighbor in self.neighbors[var]:
+                if neighbor not in assignment:
+                    if self.revise_bitsets(bitsets, neighbor, var, dict(), trail) and not bitsets[neighbor]:
+                        return False
+            return True
+
+        arcs = [(z, x) for x in changed for z in self.neighbors[x] if z not in assignment]
+        return self.ac3_bitsets(bitsets, arcs, trail)
+
+
 def main():
 
     # Check usage
@@ -0,0 +1,65 @@
+import glob
+import json
+import multiprocessing
+import os
+import sys
+
+import heredity
+
+# Model tables, computed once per process
+TABLES = heredity.model_tables()
+
+# Junction trees compiled in this process, by family shape
+TREES = dict()
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [2, 3] or (len(sys.argv) == 3 and not sys.argv[2].isdigit()):
+        sys.exit("Usage: python batch.py (directory | pattern) [processes]")
+    processes = int(sys.argv[2]) if len(sys.argv) == 3 else None
+
+    for line in score_files(find_files(sys.argv[1]), processes):
+        print(line, flush=True)
+
+
+def find_files(path):
+    """
+    Return a sorted list of the family CSV files in directory `path`, or
+    matching the glob pattern `path`.
+    """
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.csv")))
+    return sorted(glob.glob(path))
+
+
+def score_files(filenames, processes=None, chunksize=8):
+    """
+    Lazily yield one JSON line of gene and trait probabilities for every
+    family file in `filenames`, in order, spreading the files across a
+    pool of `processes` worker processes.
+    """
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(score, filenames, chunksize)
+
+
+def score(filename):
+    """
+    Return a JSON line with the gene and trait probabilities of the
+    family in `filename`, computed exactly. Junction trees are compiled
+    once per family shape and reused for later files of the same shape.
+    """
+    try:
+        people = heredity.load_data(filename)
+        shape = heredity.family_shape(people)
+        if shape not in TREES:
+            TREES[shape] = heredity.JunctionTree(shape)
+        probabilities = heredity.infer(people, TREES[shape], TABLES)
+    except (OSError, KeyError, ValueError) as error:
+        return json.dumps({"file": filename, "error": str(error)})
+    return json.dumps({"file": filename, "probabilities": probabilities})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+import heredity
+
+SIZES = [5, 8, 50, 500]
+DEPTH = 4
+OBSERVED = 0.5
+
+# Largest family each method is run on, and how far its gene
+# probabilities may be from exact inference
+LIMITS = {
+    "enumerate": 6,
+    "parallel": 6,
+    "vectorized": 9,
+    "exact": None,
+    "likelihood": None,
+    "gibbs": None,
+}
+TOLERANCES = {
+    "likelihood": 0.05,
+    "gibbs": 0.05,
+}
+TOLERANCE = 1e-6
+
+
+def main():
+
+    if len(sys.argv) > 1 and not all(arg.isdigit() for arg in sys.argv[1:]):
+        sys.exit("Usage: python benchmark.py [people ...]")
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+
+    print(f"{'people':>7} {'method':<12} {'time (s)':>10} {'max error':>10} {'agrees':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            filename = os.path.join(directory, f"family{size}.csv")
+            write_pedigree(generate_pedigree(size, DEPTH, OBSERVED, seed=size), filename)
+            for method, seconds, error in run(filename):
+                agrees = "yes" if error <= TOLERANCES.get(method, TOLERANCE) else "no"
+                print(f"{size:>7} {method:<12} {seconds:10.4f} {error:10.2e} {agrees:>7}")
+
+
+def generate_pedigree(size, depth, observed, seed=None):
+    """
+    Generate a random family of `size` people over `depth` generations,
+    where a fraction `observed` of people have a known trait.
+
+    The first generation are founders; every later person is a child of
+    a couple of the generation before, whose partner is either another
+    person of that generation or a founder marrying in. Return a list of
+    rows with fields name, mother, father and trait, like the CSV files.
+    """
+    rng = random.Random(seed)
+    rows = []
+
+    def add(mother=None, father=None):
+        rows.append({
+            "name": f"person{len(rows)}",
+            "mother": mother or "",
+            "father": father or "",
+            "trait": (str(int(rng.random() < 0.3)) if rng.random() < observed else "")
+        })
+        return rows[-1]["name"]
+
+    # Split people about evenly between generations, founders first
+    generation = [add() for _ in range(min(max(2, size // depth), size))]
+    per_generation = max(1, -(-(size - len(generation)) // max(depth - 1, 1)))
+
+    while len(rows) < size:
+        children = []
+        while len(children) < per_generation and len(rows) < size:
+            mother = rng.choice(generation)
+            if len(generation) > 1 and rng.random() < 0.5:
+                father = rng.choice([person for person in generation if person != mother])
+            else:
+                father = add()
+            if len(rows) < size:
+                children.append(add(mother, father))
+        generation = children
+
+    return rows
+
+
+def write_pedigree(rows, filename):
+    """
+    Write family `rows` (see `generate_pedigree`) to CSV file `filename`.
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["name", "mother", "father", "trait"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def max_error(probabilities, reference):
+    """
+    Return the largest difference between two gene distributions over
+    all people.
+    """
+    return max(
+        abs(probabilities[person]["gene"][count] - reference[person]["gene"][count])
+        for person in reference
+        for count in reference[person]["gene"]
+    )
+
+
+def run(filename):
+    """
+    Time every inference method of heredity.py on the family in
+    `filename`, up to the size limit of each. Return a list of (method,
+    seconds, max error against exact inference) tuples.
+    """
+    people = heredity.load_data(filename)
+    reference = heredity.infer(people)
+
+    results = []
+    for method, function in heredity.METHODS.items():
+        if LIMITS[method] is not None and len(people) > LIMITS[method]:
+            continue
+        start = time.perf_counter()
+        probabilities = function(people)
+        seconds = time.perf_counter() - start
+        results.append((method, seconds, max_error(probabilities, reference)))
+    return results
+
+
+if __name__ == "__main__":
+    main()
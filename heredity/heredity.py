@@ -1,8 +1,13 @@
 import csv
+import functools
+import heapq
 import itertools
+import multiprocessing
 import sys
+import time
+import warnings
+import numpy as np
 from numpy import prod
-import icecream
 
 PROBS = {
 
@@ -42,12 +47,29 @@ PROBS = {
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in [2, 3] or (len(sys.argv) == 3 and sys.argv[2] not in METHODS):
+        sys.exit(f"Usage: python heredity.py data.csv [{'|'.join(METHODS)}]")
     people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) == 3 else "enumerate"
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
+    probabilities = METHODS[method](people)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def empty_probabilities(people):
+    """
+    Return a `probabilities` dictionary for `people` with every
+    distribution set to 0.
+    """
+    return {
         person: {
             "gene": {
                 2: 0,
@@ -62,37 +84,123 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+def enumerate_probabilities(people):
+    """
+    Compute gene and trait probabilities for `people` by enumerating
+    every possible assignment of genes and traits.
+    """
+
+    # Keep track of gene and trait probabilities for each person
+    probabilities = empty_probabilities(people)
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Loop over all sets of people who might have the trait, skipping
+    # those that violate known information
+    for have_trait in trait_shards(people):
+        merge(probabilities, enumerate_shard(people, have_trait))
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
-    for person in people:
-        print(f"{person}:")
+
+def enumerate_parallel(people, processes=None):
+    """
+    Compute gene and trait probabilities for `people` like
+    `enumerate_probabilities`, sharding the sets of people who might have
+    the trait across a pool of `processes` worker processes.
+
+    Shards are merged in a fixed order, so the result is the same for any
+    number of processes.
+    """
+    probabilities = empty_probabilities(people)
+    with multiprocessing.Pool(processes) as pool:
+        for local in pool.imap(functools.partial(enumerate_shard, people), trait_shards(people)):
+            merge(probabilities, local)
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+    return probabilities
+
+
+def trait_shards(people):
+    """
+    Lazily yield every set of people who might have the trait that does
+    not violate known information, in a fixed order.
+    """
+    names = sorted(people)
+    fixed = mask(names, {person for person in names if people[person]["trait"]})
+    free = mask(names, {person for person in names if people[person]["trait"] is None})
+    for have_trait in submasks(free):
+        yield unmask(names, fixed | have_trait)
+
+
+def gene_assignments(people):
+    """
+    Lazily yield every (one_gene, two_genes) pair of sets of people who
+    might have one or two copies of the gene, in a fixed order.
+
+    Subsets are bitmasks over the people, and every person in
+    `two_genes` is picked from those left out of `one_gene`, so no pair
+    of overlapping sets is ever built.
+    """
+    names = sorted(people)
+    everyone = mask(names, names)
+    for one_gene in submasks(everyone):
+        for two_genes in submasks(everyone & ~one_gene):
+            yield unmask(names, one_gene), unmask(names, two_genes)
+
+
+def mask(names, subset):
+    """
+    Return the bitmask of `subset`, where bit i stands for `names[i]`.
+    """
+    return sum(1 << i for i, name in enumerate(names) if name in subset)
+
+
+def unmask(names, bits):
+    """
+    Return the set of `names` whose bits are set in bitmask `bits`.
+    """
+    return {name for i, name in enumerate(names) if bits >> i & 1}
+
+
+def submasks(bits):
+    """
+    Lazily yield every submask of bitmask `bits`, from `bits` down to 0.
+    """
+    subset = bits
+    while True:
+        yield subset
+        if not subset:
+            return
+        subset = (subset - 1) & bits
+
+
+def enumerate_shard(people, have_trait):
+    """
+    Return a `probabilities` dictionary holding the (not normalized) sum
+    of the joint probabilities of every gene assignment for people in
+    `have_trait` having the trait.
+    """
+    probabilities = empty_probabilities(people)
+
+    # Loop over all sets of people who might have the gene
+    for one_gene, two_genes in gene_assignments(people):
+        # Update probabilities with new joint probability
+        p = joint_probability(people, one_gene, two_genes, have_trait)
+        update(probabilities, one_gene, two_genes, have_trait, p)
+    return probabilities
+
+
+def merge(probabilities, local):
+    """
+    Add every probability of `local` to `probabilities`.
+    """
+    for person in probabilities:
         for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
             for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+                probabilities[person][field][value] += local[person][field][value]
 
 
 def load_data(filename):
@@ -117,17 +225,6 @@ def load_data(filename):
     return data
 
 
-def powerset(s):
-    """
-    Return a list of all possible subsets of set s.
-    """
-    s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
-
 def joint_probability(people, one_gene, two_genes, have_trait):
     """
     Compute and return a joint probability.
@@ -143,7 +240,7 @@ def joint_probability(people, one_gene, two_genes, have_trait):
     info = { 
         person:
             {
-                "ggene": 1 if person is one_gene else 2 if person in two_genes else 0,
+                "ggene": 1 if person in one_gene else 2 if person in two_genes else 0,
                 "ttrait": True if person in have_trait else False,
                 "parents": [ people[person]["father"] if people[person]["father"] else None, people[person]["mother"] if people[person]["mother"] else None]
             }
@@ -153,44 +250,27 @@ def joint_probability(people, one_gene, two_genes, have_trait):
 
     TOTAL = []
     for person in info:
-        genes_passed = []
+        genes = info[person]["ggene"]
         if all(info[person]["parents"]):
 
+            #probability of each parent passing the gene on
             father = info[person]["parents"][0]
             father_genes = info[father]["ggene"]
             father_prob = PROBS["mutation"] if father_genes == 0 else 0.5 if father_genes == 1 else 1 - PROBS["mutation"]
             mother = info[person]["parents"][1]
             mother_genes = info[mother]["ggene"]
-            mother_prob = PROBS["mutation"] if father_genes == 0 else 0.5 if father_genes == 1 else 1 - PROBS["mutation"]
-
-
-            if info[person]["ggene"] == 0:
-                genes_passed.append( 1 - father_prob * 1 - mother_prob)
-
-            elif info[person]["ggene"] == 1:
-                genes_passed.append(1 - father_prob * mother_prob + 1 - mother_prob + father_prob)
+            mother_prob = PROBS["mutation"] if mother_genes == 0 else 0.5 if mother_genes == 1 else 1 - PROBS["mutation"]
 
+            if genes == 0:
+                total_gene = (1 - father_prob) * (1 - mother_prob)
+            elif genes == 1: #from the father and not the mother, or the other way round
+                total_gene = father_prob * (1 - mother_prob) + (1 - father_prob) * mother_prob
             else: #person have 2 genes
-                genes_passed.append( father_prob * mother_prob)
-
-
-            total_gene = sum(genes_passed)
-
-            if info[person]["ttrait"]:
-                total_prob = total_gene * PROBS["trait"][info[person]["ggene"]][True]
-            else:
-                total_prob = total_gene * PROBS["trait"][info[person]["ggene"]][False]
-
-                TOTAL.append(total_prob)
+                total_gene = father_prob * mother_prob
         else:
-            total_gene = PROBS["gene"][info[person]["ggene"]]
+            total_gene = PROBS["gene"][genes]
 
-            if info[person]["ttrait"]:
-                total_prob = total_gene * PROBS["trait"][info[person]["ggene"]][True]
-            else:
-                total_prob = total_gene * PROBS["trait"][info[person]["ggene"]][False]
-
-            TOTAL.append(total_prob)
+        TOTAL.append(total_gene * PROBS["trait"][genes][info[person]["ttrait"]])
 
     return prod(TOTAL)
 
@@ -213,7 +293,7 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
         if person in have_trait:
             probabilities[person]["trait"][True] += p
         else:
-            probabilities[person]["trait"][True] += p
+            probabilities[person]["trait"][False] += p
 
 def normalize(probabilities):
     """
@@ -236,5 +316,527 @@ def normalize(probabilities):
                 element = element / sum_trait
                 probabilities[person]["trait"][key] = element
 
+def inheritance_table():
+    """
+    Return the probability of a child having 0, 1 or 2 copies of the gene
+    given the number of copies of their mother and father, as a NumPy
+    array indexed by [child, mother, father].
+    """
+    mutation = PROBS["mutation"]
+    # Probability of a parent with 0, 1 or 2 copies passing the gene on
+    passes = np.array([mutation, 0.5, 1 - mutation])
+    mother, father = np.meshgrid(passes, passes, indexing="ij")
+    return np.array([
+        (1 - mother) * (1 - father),
+        mother * (1 - father) + (1 - mother) * father,
+        mother * father
+    ])
+
+
+def trait_table():
+    """
+    Return the probability of having the trait given 0, 1 or 2 copies of
+    the gene, as a NumPy array indexed by [genes, trait].
+    """
+    return np.array([
+        [PROBS["trait"][genes][False], PROBS["trait"][genes][True]]
+        for genes in range(3)
+    ])
+
+
+def model_tables():
+    """
+    Return a tuple (prior, inheritance, trait) of the NumPy tables of the
+    model in `PROBS`: the unconditional gene probabilities, and the
+    tables of `inheritance_table` and `trait_table`.
+    """
+    prior = np.array([PROBS["gene"][genes] for genes in range(3)])
+    return prior, inheritance_table(), trait_table()
+
+
+def family_shape(people):
+    """
+    Return the shape of the family in `people`: a tuple with the indices
+    of the mother and father of every person (in order of `people`), or
+    None for people without parents listed.
+    """
+    index = {person: i for i, person in enumerate(people)}
+    return tuple(
+        (index[people[person]["mother"]], index[people[person]["father"]])
+        if people[person]["mother"] else None
+        for person in people
+    )
+
+
+class JunctionTree():
+
+    def __init__(self, shape):
+        """
+        Compile a family of the given `shape` (see `family_shape`) into a
+        junction tree over the number of genes of every person.
+
+        The Bayesian network is moralized and triangulated by eliminating
+        people in min-fill order; every elimination gives one clique of
+        the tree, linked to the clique of the first person eliminated
+        after it among its neighbors.
+        """
+        self.shape = shape
+        size = len(shape)
+
+        # Moral graph: a person's parents are linked to each other too
+        neighbors = [set() for _ in range(size)]
+        for person, parents in enumerate(shape):
+            if parents:
+                for a, b in itertools.combinations((person, *parents), 2):
+                    neighbors[a].add(b)
+                    neighbors[b].add(a)
+
+        def fill(person):
+            return sum(
+                1 for a, b in itertools.combinations(neighbors[person], 2)
+                if b not in neighbors[a]
+            )
+
+        # Eliminate people with the fewest fill-in edges first
+        heap = [(fill(person), person) for person in range(size)]
+        heapq.heapify(heap)
+        eliminated = [False] * size
+        self.order = []
+        self.cliques = [None] * size
+        while heap:
+            cost, person = heapq.heappop(heap)
+            if eliminated[person] or cost != fill(person):
+                continue
+            eliminated[person] = True
+            self.order.append(person)
+            self.cliques[person] = (person, *sorted(neighbors[person]))
+
+            # Link the remaining neighbors to each other, then forget person
+            affected = set(neighbors[person])
+            for a, b in itertools.combinations(neighbors[person], 2):
+                neighbors[a].add(b)
+                neighbors[b].add(a)
+            for neighbor in neighbors[person]:
+                neighbors[neighbor].discard(person)
+                affected |= neighbors[neighbor]
+            neighbors[person] = set()
+            for other in affected:
+                if not eliminated[other]:
+                    heapq.heappush(heap, (fill(other), other))
+
+        position = {person: i for i, person in enumerate(self.order)}
+        self.parent = [None] * size
+        self.children = [[] for _ in range(size)]
+        for person in self.order:
+            separator = self.cliques[person][1:]
+            if separator:
+                self.parent[person] = min(separator, key=position.get)
+                self.children[self.parent[person]].append(person)
+
+        # Every person's factor goes to the clique of the first person of
+        # its scope to be eliminated, which holds the whole scope
+        self.assigned = [[] for _ in range(size)]
+        for person, parents in enumerate(shape):
+            scope = (person, *parents) if parents else (person,)
+            self.assigned[min(scope, key=position.get)].append(person)
+
+    def marginals(self, traits, tables=None):
+        """
+        Return the probability of every person having 0, 1 or 2 copies of
+        the gene, given the known `traits` (True, False or None for every
+        person), as a NumPy array indexed by [person, genes]. `tables` may
+        hold the tables of `model_tables`, if already computed.
+        """
+        prior, inheritance, trait = tables or model_tables()
+
+        # Clique potentials: product of the factors assigned to each clique
+        potentials = [None] * len(self.shape)
+        for person in self.order:
+            factors = []
+            for member in self.assigned[person]:
+                parents = self.shape[member]
+                table = inheritance if parents else prior
+                if traits[member] is not None:
+                    table = table * trait[:, int(traits[member])].reshape((3,) + (1,) * (table.ndim - 1))
+                factors.append((table, [member, *parents] if parents else [member]))
+            potentials[person] = self._combine(factors, self.cliques[person])
+
+        # Upward pass, from the first eliminated cliques to the roots
+        upward = [None] * len(self.shape)
+        for person in self.order:
+            factors = [(potentials[person], list(self.cliques[person]))]
+            factors.extend((upward[child], list(self.cliques[child][1:])) for child in self.children[person])
+            upward[person] = self._combine(factors, self.cliques[person][1:])
+
+        # Downward pass, from the roots back to the first eliminated cliques
+        downward = [None] * len(self.shape)
+        for person in reversed(self.order):
+            parent = self.parent[person]
+            if parent is None:
+                continue
+            factors = [(potentials[parent], list(self.cliques[parent]))]
+            if downward[parent] is not None:
+                factors.append((downward[parent], list(self.cliques[parent][1:])))
+            factors.extend(
+                (upward[child], list(self.cliques[child][1:]))
+                for child in self.children[parent] if child != person
+            )
+            downward[person] = self._combine(factors, self.cliques[person][1:])
+
+        # Belief of each person's clique, summed down to that person
+        marginals = np.zeros((len(self.shape), 3))
+        for person in self.order:
+            factors = [(potentials[person], list(self.cliques[person]))]
+            if downward[person] is not None:
+                factors.append((downward[person], list(self.cliques[person][1:])))
+            factors.extend((upward[child], list(self.cliques[child][1:])) for child in self.children[person])
+            marginals[person] = self._combine(factors, (person,))
+        return marginals
+
+    @staticmethod
+    def _combine(factors, scope):
+        """
+        Multiply `factors`, (table, variables) pairs, sum out every variable
+        not in `scope` and return the result normalized to sum to 1.
+        """
+        # einsum only takes 52 distinct subscripts, so number them locally
+        local = {}
+        operands = []
+        for table, variables in factors:
+            operands.extend((table, [local.setdefault(v, len(local)) for v in variables]))
+        for variable in scope:
+            if variable not in local:
+                operands.extend((np.ones(3), [local.setdefault(variable, len(local))]))
+        result = np.einsum(*operands, [local[v] for v in scope])
+        return result / result.sum()
+
+
+def infer(people, tree=None, tables=None):
+    """
+    Compute gene and trait probabilities for `people` exactly, by message
+    passing on a junction tree compiled from the family (or on `tree`,
+    if already compiled for a family of the same shape). `tables` may
+    hold the tables of `model_tables`, if already computed.
+    """
+    if tree is None:
+        tree = JunctionTree(family_shape(people))
+    tables = tables or model_tables()
+    traits = [people[person]["trait"] for person in people]
+    genes = tree.marginals(traits, tables)
+
+    # Probability of unknown traits follows from the gene distribution
+    trait = genes @ tables[2][:, 1]
+    known = [i for i, value in enumerate(traits) if value is not None]
+    trait[known] = [traits[i] for i in known]
+    return array_probabilities(people, genes, trait)
+
+
+def array_probabilities(people, genes, trait):
+    """
+    Return a `probabilities` dictionary for `people` out of NumPy arrays
+    `genes`, indexed by [person, genes], and `trait`, the probability of
+    every person having the trait.
+    """
+    probabilities = empty_probabilities(people)
+    for i, person in enumerate(people):
+        for count in range(3):
+            probabilities[person]["gene"][count] = float(genes[i, count])
+        probabilities[person]["trait"][True] = float(trait[i])
+        probabilities[person]["trait"][False] = 1 - float(trait[i])
+    return probabilities
+
+
+def joint_probabilities(people, genes, traits):
+    """
+    Compute joint probabilities for a whole block of assignments at once.
+
+    `genes` is an integer array indexed by [assignment, person] holding the
+    number of copies of the gene of each person (in order of `people`),
+    and `traits` a boolean array of the same shape. Return the joint
+    probability of every assignment, computed as a sum of logarithms over
+    precomputed inheritance and trait tables.
+    """
+    shape = family_shape(people)
+    children = [i for i, parents in enumerate(shape) if parents]
+    founders = [i for i, parents in enumerate(shape) if not parents]
+    mothers = [shape[i][0] for i in children]
+    fathers = [shape[i][1] for i in children]
+
+    with np.errstate(divide="ignore"):
+        inheritance = np.log(inheritance_table())
+        trait = np.log(trait_table())
+        prior = np.log([PROBS["gene"][count] for count in range(3)])
+
+    log_joint = prior[genes[:, founders]].sum(axis=1)
+    log_joint += inheritance[genes[:, children], genes[:, mothers], genes[:, fathers]].sum(axis=1)
+    log_joint += trait[genes, traits.astype(int)].sum(axis=1)
+    return np.exp(log_joint)
+
+
+def update_arrays(gene_totals, trait_totals, genes, traits, p):
+    """
+    Add joint probabilities `p` of a block of assignments (see
+    `joint_probabilities`) to `gene_totals`, indexed by [person, genes],
+    and `trait_totals`, indexed by [person, trait].
+    """
+    for count in range(3):
+        gene_totals[:, count] += p @ (genes == count)
+    trait_totals[:, 1] += p @ traits
+    trait_totals[:, 0] += p @ ~traits
+
+
+def enumerate_vectorized(people, block_size=1 << 16):
+    """
+    Compute gene and trait probabilities for `people` like
+    `enumerate_probabilities`, but evaluating `block_size` assignments
+    at a time with NumPy arrays.
+
+    Assignment number i encodes the genes of person k as the kth base-3
+    digit of i, and the unknown traits as the bits of i // 3 ** N.
+    """
+    names = list(people)
+    known = np.array([people[person]["trait"] is not None for person in names])
+    fixed = np.array([bool(people[person]["trait"]) for person in names])
+    unknown = np.flatnonzero(~known)
+
+    gene_digits = 3 ** np.arange(len(names), dtype=np.int64)
+    trait_bits = 2 ** np.arange(len(unknown), dtype=np.int64)
+    gene_space = 3 ** len(names)
+    total = gene_space * 2 ** len(unknown)
+
+    gene_totals = np.zeros((len(names), 3))
+    trait_totals = np.zeros((len(names), 2))
+    for start in range(0, total, block_size):
+        index = np.arange(start, min(start + block_size, total), dtype=np.int64)
+        genes = (index[:, None] // gene_digits) % 3
+        traits = np.broadcast_to(fixed, genes.shape).copy()
+        traits[:, unknown] = (index[:, None] // gene_space // trait_bits) % 2 == 1
+
+        p = joint_probabilities(people, genes, traits)
+        update_arrays(gene_totals, trait_totals, genes, traits, p)
+
+    # Ensure probabilities sum to 1
+    gene_totals /= gene_totals.sum(axis=1, keepdims=True)
+    trait_totals /= trait_totals.sum(axis=1, keepdims=True)
+    return array_probabilities(people, gene_totals, trait_totals[:, 1])
+
+
+def topological_order(shape):
+    """
+    Return the indices of the people of a family of the given `shape`
+    (see `family_shape`), ordered so that parents come before children.
+    """
+    order = []
+    placed = [False] * len(shape)
+    while len(order) < len(shape):
+        for person, parents in enumerate(shape):
+            if not placed[person] and (not parents or all(placed[parent] for parent in parents)):
+                placed[person] = True
+                order.append(person)
+    return order
+
+
+def sample_genes(rng, probabilities):
+    """
+    Draw a number of copies of the gene for every row of `probabilities`,
+    a NumPy array of distributions indexed by [sample, genes].
+    """
+    return (rng.random((len(probabilities), 1)) > probabilities.cumsum(axis=1)[:, :2]).sum(axis=1)
+
+
+# Effective sample size below which likelihood weighting warns
+MIN_EFFECTIVE_SAMPLES = 100
+
+
+def approximate_probabilities(people, genes, errors):
+    """
+    Return a tuple of `probabilities` dictionaries for `people`, holding
+    estimated gene distributions `genes` and their standard `errors`
+    (both indexed by [person, genes]), with traits following from them.
+    """
+    trait = trait_table()[:, 1]
+    traits = [people[person]["trait"] for person in people]
+    known = [i for i, value in enumerate(traits) if value is not None]
+
+    p = genes @ trait
+    p[known] = [traits[i] for i in known]
+    # Standard error of a linear function of the gene estimates, taken
+    # as independent
+    e = np.sqrt((errors ** 2) @ (trait ** 2))
+    e[known] = 0
+    return array_probabilities(people, genes, p), array_probabilities(people, errors, e)
+
+
+def likelihood_weighting(people, samples=100000, deadline=None, batch=10000, seed=None):
+    """
+    Estimate gene and trait probabilities for `people` by likelihood
+    weighting: draw everyone's genes from the model, parents first, and
+    weight each sample by the probability of the known traits.
+
+    Draw `samples` samples in batches of `batch`, or stop early once
+    `deadline` seconds have passed. Return a tuple (probabilities, errors,
+    effective samples): dictionaries with the estimates and their standard
+    errors, and the effective sample size (sum of weights) ** 2 / (sum of
+    squared weights).
+
+    With many known traits the weights collapse onto a few samples; then
+    the estimates and their errors are unreliable, and a warning is given
+    when there are fewer than `MIN_EFFECTIVE_SAMPLES` effective samples.
+    """
+    prior, inheritance, trait = model_tables()
+    shape = family_shape(people)
+    traits = [people[person]["trait"] for person in people]
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+
+    with np.errstate(divide="ignore"):
+        log_trait = np.log(trait)
+
+    # Sums over every batch of the weights, the weighted gene counts and
+    # the same with squared weights, with weights kept as logarithms
+    # scaled by the largest one of their batch
+    weights, totals, squared_weights, squared_totals = [], [], [], []
+    scales = []
+    drawn = 0
+    while drawn < samples:
+        size = min(batch, samples - drawn)
+        genes = np.zeros((size, len(shape)), dtype=np.int64)
+        log_weight = np.zeros(size)
+        for person in topological_order(shape):
+            if shape[person]:
+                mother, father = shape[person]
+                distribution = inheritance[:, genes[:, mother], genes[:, father]].T
+            else:
+                distribution = np.broadcast_to(prior, (size, 3))
+            genes[:, person] = sample_genes(rng, distribution)
+            if traits[person] is not None:
+                log_weight += log_trait[genes[:, person], int(traits[person])]
+
+        scales.append(log_weight.max())
+        weight = np.exp(log_weight - scales[-1])
+        counts = [genes == count for count in range(3)]
+        weights.append(weight.sum())
+        totals.append(np.stack([weight @ count for count in counts], axis=1))
+        squared_weights.append(weight @ weight)
+        squared_totals.append(np.stack([(weight ** 2) @ count for count in counts], axis=1))
+        drawn += size
+        if deadline is not None and time.perf_counter() - start > deadline and len(totals) > 1:
+            break
+
+    scales = np.exp(np.array(scales) - max(scales))
+    weight = np.array(weights) @ scales
+    genes = np.tensordot(scales, np.array(totals), axes=1) / weight
+    squared_weight = np.array(squared_weights) @ scales ** 2
+    squared_total = np.tensordot(scales ** 2, np.array(squared_totals), axes=1)
+
+    # Standard error of the ratio estimate from the samples themselves,
+    # sqrt(sum of w^2 (x - mean)^2) / sum of w, with x the 0/1 gene count
+    # indicators, so that x^2 = x
+    spread = squared_total * (1 - 2 * genes) + genes ** 2 * squared_weight
+    errors = np.sqrt(np.maximum(spread, 0)) / weight
+    effective = weight ** 2 / squared_weight
+    if effective < MIN_EFFECTIVE_SAMPLES:
+        warnings.warn(
+            f"likelihood weighting kept only {effective:.1f} effective samples "
+            f"of {drawn}; its estimates are unreliable", RuntimeWarning
+        )
+    return (*approximate_probabilities(people, genes, errors), effective)
+
+
+def gibbs_sampling(people, samples=100000, chains=100, burn_in=100, deadline=None, seed=None):
+    """
+    Estimate gene and trait probabilities for `people` by Gibbs sampling
+    `chains` independent chains at once: every sweep redraws each
+    person's genes given their parents', children's and partners' genes
+    and their known trait.
+
+    Run `burn_in` sweeps, then enough sweeps for `samples` samples in
+    total, or stop early (after at least two sweeps past the burn-in,
+    which is cut short if needed) once `deadline` seconds have passed. Return a
+    tuple (probabilities, errors) of dictionaries with the estimates and
+    their standard errors across chains.
+    """
+    prior, inheritance, trait = model_tables()
+    shape = family_shape(people)
+    traits = [people[person]["trait"] for person in people]
+    order = topological_order(shape)
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+
+    with np.errstate(divide="ignore"):
+        log_prior, log_inheritance, log_trait = np.log(prior), np.log(inheritance), np.log(trait)
+
+    # Children of every person, with the index of their other parent
+    children = [[] for _ in shape]
+    for child, parents in enumerate(shape):
+        if parents:
+            mother, father = parents
+            children[mother].append((child, father, True))
+            children[father].append((child, mother, False))
+
+    # Start every chain from a sample of the model
+    genes = np.zeros((chains, len(shape)), dtype=np.int64)
+    for person in order:
+        if shape[person]:
+            mother, father = shape[person]
+            distribution = inheritance[:, genes[:, mother], genes[:, father]].T
+        else:
+            distribution = np.broadcast_to(prior, (chains, 3))
+        genes[:, person] = sample_genes(rng, distribution)
+
+    totals = np.zeros((chains, len(shape), 3))
+    sweep = 0
+    kept = 0
+    everyone = np.arange(3)
+    while kept < -(-samples // chains):
+        for person in order:
+            if shape[person]:
+                mother, father = shape[person]
+                log_p = log_inheritance[:, genes[:, mother], genes[:, father]].T
+            else:
+                log_p = np.broadcast_to(log_prior, (chains, 3))
+            if traits[person] is not None:
+                log_p = log_p + log_trait[:, int(traits[person])]
+            for child, partner, is_mother in children[person]:
+                if is_mother:
+                    log_p = log_p + log_inheritance[genes[:, child, None], everyone, genes[:, partner, None]]
+                else:
+                    log_p = log_p + log_inheritance[genes[:, child, None], genes[:, partner, None], everyone]
+
+            # Rao-Blackwellized: count the conditional distribution itself
+            p = np.exp(log_p - log_p.max(axis=1, keepdims=True))
+            p /= p.sum(axis=1, keepdims=True)
+            genes[:, person] = sample_genes(rng, p)
+            if sweep >= burn_in:
+                totals[:, person] += p
+
+        if sweep >= burn_in:
+            kept += 1
+        sweep += 1
+
+        # Past the deadline, cut the burn-in short, or stop
+        if deadline is not None and time.perf_counter() - start > deadline:
+            if sweep < burn_in:
+                burn_in = sweep
+            elif kept > 1:
+                break
+
+    # Every chain gives an independent estimate
+    estimates = totals / max(kept, 1)
+    genes = estimates.mean(axis=0)
+    errors = estimates.std(axis=0, ddof=1) / np.sqrt(chains) if chains > 1 else np.zeros_like(genes)
+    return approximate_probabilities(people, genes, errors)
+
+
+METHODS = {
+    "enumerate": enumerate_probabilities,
+    "parallel": enumerate_parallel,
+    "vectorized": enumerate_vectorized,
+    "exact": infer,
+    "likelihood": lambda people: likelihood_weighting(people)[0],
+    "gibbs": lambda people: gibbs_sampling(people)[0],
+}
+
+
 if __name__ == "__main__":
     main()
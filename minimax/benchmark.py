@@ -0,0 +1,180 @@
+import collections
+import contextlib
+import math
+import random
+import sys
+import time
+
+import mcts
+import mnk
+import tictactoe
+
+GAMES = 10
+
+# How to set up every engine: a function returning the game, attributes
+# to override while it plays, and the function called once per node
+ENGINES = {
+    "tictactoe": (lambda: tictactoe, {}, "search"),
+    "tictactoe-search": (lambda: tictactoe, {"TABLE": None}, "search"),
+    "mnk-3x3": (lambda: mnk.Game(time_limit=math.inf), {}, "try_move"),
+    "mnk-4x4k4": (lambda: mnk.Game(4, 4, 4, time_limit=math.inf, max_depth=4), {}, "try_move"),
+    "mcts-3x3": (lambda: mcts.Game(iterations=200, seed=0), {}, "iterate"),
+    "mcts-9x9k5": (lambda: mcts.Game(9, 9, 5, iterations=200, seed=0), {}, "iterate"),
+}
+
+# Functions whose calls are counted when profiling
+PROFILED = ["result", "winner", "terminal", "utility"]
+
+
+def main():
+
+    args = sys.argv[1:]
+    profile = bool(args) and args[-1] == "profile"
+    if profile:
+        args = args[:-1]
+    if len(args) > 1 or not all(arg.isdigit() for arg in args):
+        sys.exit("Usage: python benchmark.py [games] [profile]")
+    games = int(args[0]) if args else GAMES
+
+    print(f"{'engine':<17} {'moves':>6} {'latency (ms)':>13} {'nodes':>10} {'nodes/s':>10} {'TT hits':>8} {'table hits':>11}")
+    calls = dict()
+    for name in ENGINES:
+        moves, seconds, counts = run(name, games, profile)
+        print(
+            f"{name:<17} {moves:>6} {1000 * seconds / moves:13.3f} {counts['nodes']:>10}"
+            f" {counts['nodes'] / seconds:10.0f} {hit_rate(counts, 'transpositions'):>8}"
+            f" {hit_rate(counts, 'table'):>11}"
+        )
+        calls[name] = counts
+
+    if profile:
+        print()
+        print(f"{'engine':<17}" + "".join(f" {function:>10}" for function in PROFILED))
+        for name, counts in calls.items():
+            print(f"{name:<17}" + "".join(f" {counts[function]:>10}" for function in PROFILED))
+
+
+class CountingDict(dict):
+    """
+    Transposition table counting its lookups, and how many found an entry.
+    """
+
+    def __init__(self, counts):
+        super().__init__()
+        self.counts = counts
+
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        self.counts["transpositions probes"] += 1
+        self.counts["transpositions hits"] += value is not None
+        return value
+
+
+class CountingTable():
+    """
+    Solved table counting its lookups, and how many found a position.
+    """
+
+    def __init__(self, table, counts):
+        self.table = table
+        self.counts = counts
+
+    def __getitem__(self, index):
+        entry = self.table[index]
+        self.counts["table probes"] += 1
+        self.counts["table hits"] += entry != tictactoe.UNREACHABLE
+        return entry
+
+
+def counting(function, name, counts):
+    """
+    Return `function` counting its calls in `counts[name]`.
+    """
+    def counted(*args, **kwargs):
+        counts[name] += 1
+        return function(*args, **kwargs)
+    return counted
+
+
+@contextlib.contextmanager
+def patched(target, attributes):
+    """
+    Set `attributes` (a dictionary of names and values) on `target`, a
+    module or game, and put the old values back afterwards.
+    """
+    old = {name: getattr(target, name) for name in attributes}
+    for name, value in attributes.items():
+        setattr(target, name, value)
+    try:
+        yield target
+    finally:
+        for name, value in old.items():
+            setattr(target, name, value)
+
+
+def self_play(game, games, seed=0):
+    """
+    Play `games` games of `game` against itself, each from a random
+    first move. Return a tuple (AI moves, seconds spent on them).
+    """
+    rng = random.Random(seed)
+    moves, seconds = 0, 0
+    for _ in range(games):
+        board = game.initial_state()
+        board = game.result(board, rng.choice(sorted(game.actions(board))))
+        while not game.terminal(board):
+            start = time.perf_counter()
+            move = game.minimax(board)
+            seconds += time.perf_counter() - start
+            board = game.result(board, move)
+            moves += 1
+    return moves, seconds
+
+
+def run(name, games, profile=False):
+    """
+    Benchmark engine `name` of `ENGINES` over `games` self-play games.
+
+    The games are played twice: once to time them, and once with every
+    node, cache lookup and (if `profile`) call of the `PROFILED`
+    functions counted, which slows the search down. Return a tuple
+    (moves, seconds, counts).
+    """
+    setup, settings, node_function = ENGINES[name]
+
+    game = setup()
+    with patched(game, settings):
+        tictactoe.TRANSPOSITIONS.clear()
+        moves, seconds = self_play(game, games)
+
+    game = setup()
+    counts = collections.Counter()
+    hooks = dict(settings)
+    hooks[node_function] = counting(getattr(game, node_function), "nodes", counts)
+    for attribute in ["TRANSPOSITIONS", "transpositions"]:
+        if hasattr(game, attribute):
+            hooks[attribute] = CountingDict(counts)
+    if getattr(game, "TABLE", None) is not None and hooks.get("TABLE", True) is not None:
+        hooks["TABLE"] = CountingTable(game.TABLE, counts)
+    if profile:
+        for function in PROFILED:
+            hooks[function] = counting(getattr(game, function), function, counts)
+    with patched(game, hooks):
+        self_play(game, games)
+
+    return moves, seconds, counts
+
+
+def hit_rate(counts, cache):
+    """
+    Return the share of lookups in `cache` that found an entry, formatted
+    as a percentage, or "-" if it was never looked in.
+    """
+    probes = counts[f"{cache} probes"]
+    if not probes:
+        return "-"
+    return f"{100 * counts[f'{cache} hits'] / probes:.1f}%"
+
+
+if __name__ == "__main__":
+    main()
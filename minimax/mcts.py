@@ -0,0 +1,194 @@
+"""
+Monte Carlo Tree Search Player for m,n,k-games
+"""
+import math
+import time
+
+import numpy as np
+
+import mnk
+
+# Weight of exploring little-visited moves against playing well-scoring ones
+EXPLORATION = math.sqrt(2)
+
+# Random games played at once from every new node
+PLAYOUTS = 16
+
+
+class Node():
+
+    def __init__(self, parent=None, move=None, side=None, won=False):
+        """
+        Create a node of the search tree reached by `side` (0 for X, 1 for
+        O) playing `move`, which wins the game if `won`.
+        `wins` counts the games won by `side` from here, draws as half.
+        """
+        self.parent = parent
+        self.move = move
+        self.side = side
+        self.won = won
+        self.children = dict()
+        self.untried = None
+        self.visits = 0
+        self.wins = 0
+
+    def select(self, exploration):
+        """
+        Return the child with the best UCT score.
+        """
+        log_visits = math.log(self.visits)
+        return max(
+            self.children.values(),
+            key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+        )
+
+
+class Game(mnk.Game):
+
+    def __init__(self, m=3, n=3, k=3, time_limit=1.0, iterations=None,
+                 playouts=PLAYOUTS, exploration=EXPLORATION, seed=None):
+        """
+        Create an m,n,k-game like `mnk.Game`, whose `minimax` picks moves
+        by Monte Carlo Tree Search instead: it grows the tree for
+        `iterations` iterations, or `time_limit` seconds if None, and plays
+        `playouts` random games from every node it adds.
+        """
+        super().__init__(m, n, k, time_limit)
+        self.iterations = iterations
+        self.playouts = playouts
+        self.exploration = exploration
+        self.rng = np.random.default_rng(seed)
+        self.window_cells = np.array(self.windows, dtype=np.int64).reshape(-1, k)
+
+        # Tree of the last search, kept for the next move
+        self.tree = None
+        self.tree_cells = None
+
+    def minimax(self, board):
+        """
+        Returns the most promising action for the current player on the
+        board, as the most visited move of the search tree.
+        """
+        if self.terminal(board):
+            return None
+
+        position = mnk.Position(self, board)
+        side = 0 if self.player(board) == mnk.X else 1
+        root = self.reuse(position.cells)
+        deadline = time.perf_counter() + self.time_limit
+
+        iteration = 0
+        while (iteration < self.iterations if self.iterations is not None
+               else iteration == 0 or time.perf_counter() < deadline):
+            self.iterate(root, position, side)
+            iteration += 1
+
+        self.tree, self.tree_cells = root, list(position.cells)
+        best = max(root.children.values(), key=lambda child: child.visits)
+        return divmod(best.move, self.n)
+
+    def reuse(self, cells):
+        """
+        Return the node of the last search tree for the position with
+        `cells`, if it is that of the tree or one or two moves later, or
+        a new tree otherwise.
+        """
+        if self.tree is not None:
+            played = [
+                cell for cell in range(len(cells)) if cells[cell] != self.tree_cells[cell]
+            ]
+            if all(self.tree_cells[cell] is None for cell in played) and len(played) <= 2:
+                node = self.tree
+                for _ in played:
+                    node = next(
+                        (child for child in node.children.values()
+                         if child.move in played and cells[child.move] == child.side),
+                        None
+                    )
+                    if node is None:
+                        break
+                if node is not None:
+                    node.parent = None
+                    return node
+        return Node()
+
+    def iterate(self, root, position, side):
+        """
+        Run one iteration of the search from `root`, the node of
+        `position` with `side` to move: select a leaf by UCT, add a child
+        to it, score the child with random playouts and update the nodes
+        on the way.
+        """
+        node = root
+        path = []
+
+        # Selection
+        while not node.won and node.untried == [] and node.children:
+            node = node.select(self.exploration)
+            position.play(node.move, node.side)
+            path.append(node)
+            side = 1 - side
+
+        # Expansion
+        if not node.won and position.stones < len(position.cells):
+            if node.untried is None:
+                node.untried = position.candidates()[::-1]
+            move = node.untried.pop()
+            child = Node(node, move, side, position.play(move, side))
+            node.children[move] = child
+            node = child
+            path.append(node)
+            side = 1 - side
+
+        # Simulation
+        if node.won:
+            count, wins, draws = self.playouts, self.playouts, 0
+        elif position.stones == len(position.cells):
+            count, wins, draws = self.playouts, 0, self.playouts
+        else:
+            x_wins, o_wins, draws = self.playout(position.cells, side, self.playouts)
+            count = self.playouts
+            wins = o_wins if side == 0 else x_wins
+
+        # Backpropagation, alternating between the players
+        for node in reversed(path):
+            position.undo(node.move, node.side)
+        node = path[-1] if path else root
+        while node is not None:
+            node.visits += count
+            node.wins += wins + draws / 2
+            wins = count - wins - draws
+            node = node.parent
+
+    def playout(self, cells, side, count):
+        """
+        Play `count` random games at once from `cells`, with `side` to
+        move, and return a tuple (X wins, O wins, draws).
+
+        Every game fills the empty cells in a random order, and is won by
+        whoever completes the first window of k cells of their own.
+        """
+        size = len(cells)
+        board = np.array([-1 if cell is None else cell for cell in cells])
+        empty = np.flatnonzero(board < 0)
+        if len(self.window_cells) == 0:
+            return 0, 0, count
+
+        # Turn on which every cell is played, and by whom
+        turn = np.full((count, size), -1)
+        turn[:, empty] = np.argsort(self.rng.random((count, len(empty))), axis=1)
+        owner = np.tile(board, (count, 1))
+        owner[:, empty] = (side + turn[:, empty]) % 2
+
+        # Turn on which every window is completed by a single player
+        window_owner = owner[:, self.window_cells]
+        complete = (window_owner == window_owner[:, :, :1]).all(axis=2)
+        finish = np.where(complete, turn[:, self.window_cells].max(axis=2), size)
+
+        first = finish.argmin(axis=1)
+        games = np.arange(count)
+        won = finish[games, first] < size
+        winners = window_owner[games, first, 0][won]
+        x_wins = int((winners == 0).sum())
+        o_wins = len(winners) - x_wins
+        return x_wins, o_wins, count - x_wins - o_wins
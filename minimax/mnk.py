@@ -0,0 +1,413 @@
+"""
+m,n,k-game Player: tic-tac-toe on an m x n board, won by k in a row
+"""
+import math
+import multiprocessing
+import random
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won game, well above any heuristic score
+WIN = 10 ** 9
+
+# Kind of value stored in the transposition table
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Transposition table entries kept before starting over
+MAX_TRANSPOSITIONS = 1000000
+
+# Game searching root moves in a worker process of a parallel game
+WORKER_GAME = None
+
+
+class TimeUp(Exception):
+    """Raised when a search runs out of its time budget."""
+
+
+class Game():
+
+    X = X
+    O = O
+    EMPTY = EMPTY
+
+    def __init__(self, m=3, n=3, k=3, time_limit=1.0, max_depth=None, processes=1):
+        """
+        Create an m,n,k-game: `m` rows, `n` columns, won by `k` in a row.
+        `minimax` searches for at most `time_limit` seconds and `max_depth`
+        moves ahead per move, splitting the moves to search between
+        `processes` worker processes (all cores if None).
+        """
+        self.m = m
+        self.n = n
+        self.k = k
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.processes = processes
+        self.pool = None
+
+        # Every window of k cells in a line, and the windows through each cell
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append([(i + di * s) * n + (j + dj * s) for s in range(k)])
+        self.windows_of = [[] for _ in range(m * n)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.windows_of[cell].append(w)
+
+        # Heuristic worth of a window holding only c stones of one player
+        self.weights = [0] + [4 ** c for c in range(1, k)] + [WIN]
+
+        # Random keys of every (player, cell) for Zobrist hashing
+        rng = random.Random(0)
+        self.keys = [[rng.getrandbits(64) for _ in range(m * n)] for _ in range(2)]
+
+        # Only cells near stones are searched on large boards
+        self.radius = None if m * n <= 25 else 1
+        self.transpositions = dict()
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        stones = sum(cell is not EMPTY for row in board for cell in row)
+        return X if stones % 2 == 0 else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j) for i in range(self.m) for j in range(self.n)
+            if board[i][j] is EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        if action not in self.actions(board):
+            raise Exception("You can't make that move!")
+        copie = [row.copy() for row in board]
+        copie[action[0]][action[1]] = self.player(board)
+        return copie
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = [cell for row in board for cell in row]
+        for window in self.windows:
+            first = cells[window[0]]
+            if first is not EMPTY and all(cells[cell] == first for cell in window):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(cell is not EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+    def minimax(self, board):
+        """
+        Returns the best action found for the current player on the board,
+        by iterative-deepening alpha-beta search with a heuristic evaluator
+        within `time_limit` seconds.
+        """
+        if self.terminal(board):
+            return None
+
+        position = Position(self, board)
+        side = 0 if self.player(board) == X else 1
+        deadline = time.perf_counter() + self.time_limit
+        moves = position.candidates()
+        best_move = moves[0]
+
+        empty = sum(cell is EMPTY for row in board for cell in row)
+        for depth in range(1, min(empty, self.max_depth or empty) + 1):
+            try:
+                value, move = self.root(position, depth, side, moves, deadline)
+            except TimeUp:
+                break
+            best_move = move
+            # Search the best move first at the next depth
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(value) >= WIN:
+                break
+
+        return divmod(best_move, self.n)
+
+    def root(self, position, depth, side, moves, deadline):
+        """
+        Search `moves` of `side` (0 for X, 1 for O) to `depth` and return a
+        tuple (value, move) of the best one.
+        """
+        if self.processes != 1 and len(moves) > 1:
+            return self.root_parallel(position, depth, side, moves, deadline)
+
+        alpha, beta = -math.inf, math.inf
+        best_move = moves[0]
+        for move in moves:
+            value = self.try_move(position, move, depth, alpha, beta, side, deadline)
+            if value > alpha:
+                alpha, best_move = value, move
+        return alpha, best_move
+
+    def root_parallel(self, position, depth, side, moves, deadline):
+        """
+        Like `root`, but once the first move is searched the others are
+        searched at the same time by the worker processes, all with the
+        value of the first move as lower bound ("young brothers wait").
+
+        Every move better than the first gets its exact value, so the
+        first of the best moves is the one `root` would pick.
+        """
+        alpha = self.try_move(position, moves[0], depth, -math.inf, math.inf, side, deadline)
+        best_move = moves[0]
+        if alpha >= WIN:
+            return alpha, best_move
+
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(
+                self.processes, initializer=init_worker, initargs=(self.m, self.n, self.k)
+            )
+        board = position.board()
+        values = self.pool.starmap(
+            search_move,
+            [(board, move, depth, alpha, side, deadline) for move in moves[1:]],
+            chunksize=1
+        )
+        if None in values:
+            raise TimeUp()
+
+        for move, value in zip(moves[1:], values):
+            if value > alpha:
+                alpha, best_move = value, move
+        return alpha, best_move
+
+    def close(self):
+        """
+        Stop the worker processes of a parallel game, if any.
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+    def try_move(self, position, move, depth, alpha, beta, side, deadline):
+        """
+        Return the value for `side` of playing `move` in `position`, with
+        the rest searched to `depth` - 1.
+        """
+        won = position.play(move, side)
+        try:
+            if won:
+                # Sooner wins are worth more
+                return WIN + depth
+            return -self.negamax(position, depth - 1, -beta, -alpha, 1 - side, deadline)
+        finally:
+            position.undo(move, side)
+
+    def negamax(self, position, depth, alpha, beta, side, deadline):
+        """
+        Return the value of `position` for `side` to move, searched to
+        `depth` with alpha-beta pruning and a transposition table.
+        """
+        if time.perf_counter() > deadline:
+            raise TimeUp()
+
+        if position.stones == len(position.cells):
+            return 0
+        if depth == 0:
+            return position.score if side == 0 else -position.score
+        moves = position.candidates()
+
+        key = (position.hash, side)
+        entry = self.transpositions.get(key)
+        if entry is not None:
+            entry_depth, value, kind, best = entry
+            # Values of deeper searches would make the result depend on
+            # what was searched before, and differ between processes
+            if entry_depth == depth:
+                if kind == EXACT:
+                    return value
+                if kind == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+            # Search the best move of an earlier search first
+            if best in moves:
+                moves.remove(best)
+                moves.insert(0, best)
+
+        original_alpha = alpha
+        best_value, best_move = -math.inf, moves[0]
+        for move in moves:
+            value = self.try_move(position, move, depth, alpha, beta, side, deadline)
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        # A value outside the window is only a bound on the real one
+        if best_value <= original_alpha:
+            kind = UPPER
+        elif best_value >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        if len(self.transpositions) >= MAX_TRANSPOSITIONS:
+            self.transpositions.clear()
+        self.transpositions[key] = (depth, best_value, kind, best_move)
+        return best_value
+
+
+def init_worker(m, n, k):
+    """
+    Set up the game searched by a worker process of a parallel game.
+    """
+    global WORKER_GAME
+    WORKER_GAME = Game(m, n, k)
+
+
+def search_move(board, move, depth, alpha, side, deadline):
+    """
+    Return the value for `side` of playing `move` on `board` in a worker
+    process, with the rest searched to `depth` - 1 and `alpha` as lower
+    bound, or None if the search runs out of time.
+    """
+    position = Position(WORKER_GAME, board)
+    try:
+        return WORKER_GAME.try_move(position, move, depth, alpha, math.inf, side, deadline)
+    except TimeUp:
+        return None
+
+
+class Position():
+
+    def __init__(self, game, board):
+        """
+        Create a searchable position of `game` from `board`: a flat list
+        of cells, with the number of stones, the stone counts of every
+        window, the heuristic score (for X) and the Zobrist hash kept up
+        to date by `play` and `undo`.
+        """
+        self.game = game
+        self.cells = [None] * (game.m * game.n)
+        self.counts = [[0] * len(game.windows), [0] * len(game.windows)]
+        self.score = 0
+        self.hash = 0
+        self.stones = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell is not EMPTY:
+                    self.play(i * game.n + j, 0 if cell == X else 1)
+
+    def board(self):
+        """
+        Return the position as a board of X, O and EMPTY.
+        """
+        n = self.game.n
+        return [
+            [EMPTY if cell is None else (X, O)[cell] for cell in self.cells[i * n:(i + 1) * n]]
+            for i in range(self.game.m)
+        ]
+
+    def window_score(self, w):
+        """
+        Return the heuristic score (for X) of window `w`.
+        """
+        x, o = self.counts[0][w], self.counts[1][w]
+        if x and o:
+            return 0
+        return self.game.weights[x] - self.game.weights[o]
+
+    def play(self, cell, side):
+        """
+        Place a stone of `side` (0 for X, 1 for O) on `cell`.
+        Return True if it completes k in a row.
+        """
+        won = False
+        counts = self.counts[side]
+        for w in self.game.windows_of[cell]:
+            self.score -= self.window_score(w)
+            counts[w] += 1
+            self.score += self.window_score(w)
+            if counts[w] == self.game.k:
+                won = True
+        self.cells[cell] = side
+        self.hash ^= self.game.keys[side][cell]
+        self.stones += 1
+        return won
+
+    def undo(self, cell, side):
+        """
+        Remove the stone of `side` from `cell`.
+        """
+        counts = self.counts[side]
+        for w in self.game.windows_of[cell]:
+            self.score -= self.window_score(w)
+            counts[w] -= 1
+            self.score += self.window_score(w)
+        self.cells[cell] = None
+        self.hash ^= self.game.keys[side][cell]
+        self.stones -= 1
+
+    def candidates(self):
+        """
+        Return the empty cells worth searching, best looking first: every
+        empty cell on small boards, otherwise cells next to a stone (or
+        the center of an empty board).
+        """
+        game = self.game
+        cells = self.cells
+        if game.radius is None:
+            moves = [cell for cell in range(len(cells)) if cells[cell] is None]
+        else:
+            near = set()
+            for cell, stone in enumerate(cells):
+                if stone is not None:
+                    i, j = divmod(cell, game.n)
+                    for ni in range(max(0, i - game.radius), min(game.m, i + game.radius + 1)):
+                        for nj in range(max(0, j - game.radius), min(game.n, j + game.radius + 1)):
+                            if cells[ni * game.n + nj] is None:
+                                near.add(ni * game.n + nj)
+            center = (game.m // 2) * game.n + game.n // 2
+            if near:
+                moves = list(near)
+            elif cells[center] is None:
+                moves = [center]
+            else:
+                moves = [cell for cell in range(len(cells)) if cells[cell] is None]
+
+        # Cells in windows with more stones (of either player) come first
+        def promise(cell):
+            return sum(
+                game.weights[self.counts[0][w]] + game.weights[self.counts[1][w]]
+                for w in game.windows_of[cell]
+            )
+        moves.sort(key=promise, reverse=True)
+        return moves
@@ -2,8 +2,22 @@ import pygame
 import sys
 import time
 
+import mcts
+import mnk
 import tictactoe as ttt
 
+# Optionally play an m,n,k-game instead of tic-tac-toe, or against MCTS
+args = sys.argv[1:]
+use_mcts = bool(args) and args[-1] == "mcts"
+if use_mcts:
+    args = args[:-1]
+if len(args) not in [0, 3] or not all(arg.isdigit() for arg in args):
+    sys.exit("Usage: python runner.py [m n k] [mcts]")
+if use_mcts:
+    ttt = mcts.Game(*(int(arg) for arg in args or [3, 3, 3]))
+elif args:
+    ttt = mnk.Game(*(int(arg) for arg in args))
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -13,12 +27,16 @@ white = (255, 255, 255)
 
 screen = pygame.display.set_mode(size)
 
-mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
-largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
-
 user = None
 board = ttt.initial_state()
+rows, columns = len(board), len(board[0])
+
+# Tiles shrink to fit bigger boards below the title
+tile_size = min(80, (height - 140) // rows, (width - 40) // columns)
+
+mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
+largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 ai_turn = False
 
 while True:
@@ -67,19 +85,18 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (columns / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):  #DRAW THE BORD AND CHECK MOVES IF SUCH ARE MADE
+        for i in range(rows):  #DRAW THE BORD AND CHECK MOVES IF SUCH ARE MADE
             row = []
-            for j in range(3):
+            for j in range(columns):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
                     tile_size, tile_size
                 )
-                pygame.draw.rect(screen, white, rect, 3)
+                pygame.draw.rect(screen, white, rect, max(1, round(tile_size / 27)))
 
                 if board[i][j] != ttt.EMPTY:
                     move = moveFont.render(board[i][j], True, white)
@@ -121,8 +138,8 @@ while True:
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(columns):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
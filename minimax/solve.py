@@ -0,0 +1,73 @@
+import sys
+
+import tictactoe as ttt
+
+
+def main():
+
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python solve.py [table]")
+    filename = sys.argv[1] if len(sys.argv) == 2 else ttt.TABLE_FILE
+
+    table = solve()
+    with open(filename, "wb") as f:
+        f.write(table)
+
+    positions = sum(entry != ttt.UNREACHABLE for entry in table)
+    print(f"Solved {positions} positions, written to {filename}")
+
+
+def reachable_positions():
+    """
+    Return a list, for every number of stones 0-9, of the bitboards (x, o)
+    of every position that can come up in a game.
+    """
+    levels = [{(0, 0)}]
+    for _ in range(9):
+        children = set()
+        for x, o in levels[-1]:
+            if ttt.bit_winner(x, o) is not None:
+                continue
+            x_turn = ttt.bit_player(x, o) == ttt.X
+            for move in ttt.bit_actions(x, o):
+                bit = 1 << move
+                children.add((x | bit, o) if x_turn else (x, o | bit))
+        levels.append(children)
+    return levels
+
+
+def solve():
+    """
+    Solve tic-tac-toe by retrograde analysis: value every position, from
+    full boards back to the empty one, from the values of its children.
+
+    Return the table as bytes indexed by `ttt.table_index`: the value
+    (1 if X wins, -1 if O wins, 0 for a tie) plus 1 in the low 2 bits, and
+    the best move (0-8, or `ttt.NO_MOVE` when the game is over) in the
+    high 4 bits. Among equally good moves the first in `MOVE_ORDER` is
+    kept, as `minimax` picks it.
+    """
+    table = bytearray([ttt.UNREACHABLE]) * 3 ** 9
+    values = dict()
+
+    for level in reversed(reachable_positions()):
+        for x, o in level:
+            if ttt.bit_terminal(x, o):
+                value = {ttt.X: 1, ttt.O: -1, None: 0}[ttt.bit_winner(x, o)]
+                move = ttt.NO_MOVE
+            else:
+                x_turn = ttt.bit_player(x, o) == ttt.X
+                value, move = None, None
+                for child in ttt.bit_actions(x, o):
+                    bit = 1 << child
+                    child_value = values[(x | bit, o) if x_turn else (x, o | bit)]
+                    if value is None or (child_value > value if x_turn else child_value < value):
+                        value, move = child_value, child
+            values[(x, o)] = value
+            table[ttt.table_index(x, o)] = move << 2 | (value + 1)
+
+    return bytes(table)
+
+
+if __name__ == "__main__":
+    main()
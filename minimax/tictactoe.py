@@ -2,9 +2,8 @@
 Tic Tac Toe Player
 """
 import icecream
-import copy
 import math
-import numpy as np
+import os
 import random
 # from pympler import muppy
 # all_objects = muppy.get_objects()
@@ -13,6 +12,47 @@ X = "X"
 O = "O"
 EMPTY = None
 
+# Cells of the board numbered 0-8, row by row
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8),
+         (0, 3, 6), (1, 4, 7), (2, 5, 8),
+         (0, 4, 8), (2, 4, 6)]
+
+# The 8 rotations and reflections of the board: cell k of the transformed
+# board is cell SYMMETRIES[s][k] of the original one
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8), (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0), (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6), (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8), (8, 5, 2, 7, 4, 1, 6, 3, 0),
+]
+
+# Center first, then corners, then edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Bitboards of the lines, and of the full board
+WIN_MASKS = [sum(1 << cell for cell in line) for line in LINES]
+FULL = (1 << 9) - 1
+
+# Every bitboard transformed by each of the symmetries
+PERMUTED = [
+    [sum(1 << k for k in range(9) if bits >> symmetry[k] & 1) for bits in range(1 << 9)]
+    for symmetry in SYMMETRIES
+]
+
+# Kind of value stored in the transposition table
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Values of positions already searched, by canonical board hash
+TRANSPOSITIONS = dict()
+
+# Solved table written by solve.py, one byte per board by `table_index`
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.bin")
+NO_MOVE = 15
+UNREACHABLE = 0xFF
+
+# Base-3 digits of every bitboard: bit k set gives 3 ** k
+TERNARY = [sum(3 ** k for k in range(9) if bits >> k & 1) for bits in range(1 << 9)]
+
 def initial_state():
     """
     Returns starting state of the board.
@@ -60,98 +100,35 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    current_player = player(board)
-    possible_moves = actions(board)
-    if action not in possible_moves:
+    if action not in actions(board):
         raise Exception("You can't make that move!")
 
-    copie = copy.deepcopy(board)
-
-    copie[action[0]][action[1]] = current_player
-
+    copie = [row.copy() for row in board]
+    copie[action[0]][action[1]] = player(board)
     return copie
 
+
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
+    x, o = to_bitboard(board)
+    return bit_winner(x, o)
 
 
-    x = copy.deepcopy(board)
-    y = copy.deepcopy(board)
-
-    for i in range(0,3):
-        for j in range(0,3):
-            if x[i][j] != "X":
-                x[i][j] = False
-            else:
-                x[i][j] = True
-
-
-    for i in range (0,3):
-        for j in range (0,3):
-            if y[i][j] != "O":
-                y[i][j] = False
-            else:
-                y[i][j] = True
-
-    for element in x:
-        if all(element):
-            return "X"
-
-    for element in y:
-        if all(element):
-            return "O"
-
-
-
-    if x[0][0] == x[1][1] == x[2][2] or x[0][2] == x[1][1] == x[2][0]:
-        if False not in [x[0][0],x[1][1], x[2][2]] or False not in [x[0][2],x[1][1],x[2][0]]:
-            return "X"
-
-    if y[0][0] == y[1][1] == y[2][2] or y[0][2] == y[1][1] == y[2][0]:
-        if False not in [y[0][0],y[1][1], y[2][2]] or False not in [y[0][2],y[1][1],y[2][0]]:
-            return "O"
-
-    x = np.array(x)
-    y = np.array(y)
-
-    x = np.transpose(x)
-    y = np.transpose(y)
-
-    for element in x:
-        if all(element):
-            return "X"
-
-    for element in y:
-        if all(element):
-            return "O"
-
-    return None
-
 def terminal(board):
-    if winner(board) == "X" or winner(board) == "O":
-        return True
-
-    table = []
-    for element in board:
-        for inner in element:
-           table.append(inner)
-
-    if None not in table:
-        return True
-
-    return False
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = to_bitboard(board)
+    return bit_terminal(x, o)
 
 
 def utility(board):
-    if winner(board) == "X":
-        return 1
-    if winner(board) == "O":
-        return -1
-
-    if None not in (board[0], board[1], board[2]):
-        return 0
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return {X: 1, O: -1, None: 0}[winner(board)]
 
 
 def max_value(board):
@@ -169,24 +146,182 @@ def min_value(board):
     for action in actions(board):
         v = min(v, max_value(result(board, action)))
     return v
-def minimax(board):
 
-    if terminal(board):
+
+def to_bitboard(board):
+    """
+    Returns `board` as a pair of 9-bit integers (x, o), where bit 3i + j
+    of x (or o) is set if X (or O) played at (i, j).
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def from_bitboard(x, o):
+    """
+    Returns the board represented by bitboards `x` and `o`.
+    """
+    return [
+        [X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def bit_player(x, o):
+    """
+    Returns the player who has the next turn on bitboards `x` and `o`.
+    """
+    return X if bin(x).count("1") == bin(o).count("1") else O
+
+
+def bit_actions(x, o):
+    """
+    Returns the cells (0-8) still empty on bitboards `x` and `o`, in
+    `MOVE_ORDER`.
+    """
+    taken = x | o
+    return [move for move in MOVE_ORDER if not taken >> move & 1]
+
+
+def bit_winner(x, o):
+    """
+    Returns the winner on bitboards `x` and `o`, if there is one.
+    """
+    for mask in WIN_MASKS:
+        if x & mask == mask:
+            return X
+        if o & mask == mask:
+            return O
+    return None
+
+
+def bit_terminal(x, o):
+    """
+    Returns True if the game on bitboards `x` and `o` is over.
+    """
+    return (x | o) == FULL or bit_winner(x, o) is not None
+
+
+def table_index(x, o):
+    """
+    Returns the index of bitboards `x` and `o` in the solved table: the
+    board read as a base-3 number, cell k being digit k (0 empty, 1 X, 2 O).
+    """
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def load_table(filename=TABLE_FILE):
+    """
+    Returns the solved table in `filename` (see solve.py), or None if
+    there is no valid table there.
+    """
+    try:
+        with open(filename, "rb") as f:
+            table = f.read()
+    except OSError:
         return None
+    return table if len(table) == 3 ** 9 else None
+
 
-    if player(board) == "X":
-        moves = []
+def canonical(x, o):
+    """
+    Returns the hash of bitboards `x` and `o` shared by all rotations and
+    reflections of the board.
+    """
+    return min(permuted[x] | permuted[o] << 9 for permuted in PERMUTED)
 
-        for action in actions(board):
-            moves.append([min_value(result(board, action)), action])
 
-        return sorted(moves, key=lambda x: x[0], reverse=True)[0][1]
+def search(x, o, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the value of bitboards `x` and `o`: 1 if X wins, -1 if O
+    wins, 0 for a tie with perfect play.
 
+    Uses alpha-beta pruning within window [`alpha`, `beta`], trying moves
+    in `MOVE_ORDER`, and a transposition table shared by symmetric boards.
+    """
+    for mask in WIN_MASKS:
+        if x & mask == mask:
+            return 1
+        if o & mask == mask:
+            return -1
+    taken = x | o
+    if taken == FULL:
+        return 0
 
-    elif player(board) == "O":
-        moves = []
+    key = canonical(x, o)
+    entry = TRANSPOSITIONS.get(key)
+    if entry is not None:
+        value, kind = entry
+        if kind == EXACT:
+            return value
+        if kind == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    x_turn = bin(x).count("1") == bin(o).count("1")
+    original_alpha, original_beta = alpha, beta
+    best = -math.inf if x_turn else math.inf
+    for move in MOVE_ORDER:
+        bit = 1 << move
+        if taken & bit:
+            continue
+        if x_turn:
+            best = max(best, search(x | bit, o, alpha, beta))
+            alpha = max(alpha, best)
+        else:
+            best = min(best, search(x, o | bit, alpha, beta))
+            beta = min(beta, best)
+        if alpha >= beta:
+            break
+
+    # A value outside the window is only a bound on the real one
+    if best <= original_alpha:
+        TRANSPOSITIONS[key] = (best, UPPER)
+    elif best >= original_beta:
+        TRANSPOSITIONS[key] = (best, LOWER)
+    else:
+        TRANSPOSITIONS[key] = (best, EXACT)
+    return best
 
-        for action in actions(board):
-            moves.append([max_value(result(board, action)), action])
 
-        return sorted(moves, key=lambda x: x[0])[0][1]
\ No newline at end of file
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    x, o = to_bitboard(board)
+    if bit_terminal(x, o):
+        return None
+
+    # Look the move up when the game has been solved ahead of time
+    if TABLE is not None:
+        entry = TABLE[table_index(x, o)]
+        if entry != UNREACHABLE:
+            return divmod(entry >> 2, 3)
+
+    x_turn = bit_player(x, o) == X
+    alpha, beta = -math.inf, math.inf
+    best_move = None
+    for move in bit_actions(x, o):
+        bit = 1 << move
+        # Only a move better than the best so far gets an exact value
+        if x_turn:
+            value = search(x | bit, o, alpha, beta)
+            if value > alpha:
+                alpha, best_move = value, move
+        else:
+            value = search(x, o | bit, alpha, beta)
+            if value < beta:
+                beta, best_move = value, move
+    return divmod(best_move, 3)
+
+
+TABLE = load_table()
@@ -0,0 +1,162 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import pagerank
+
+SIZES = [1000, 10000, 100000, 1000000]
+LINKS = 8
+EXPONENT = 2.1
+
+# Functions that are O(N) per step or O(N^2) per iteration are only
+# timed on corpora up to this size
+SLOW_LIMIT = 1000
+
+
+def main():
+
+    if len(sys.argv) > 1 and not all(arg.isdigit() for arg in sys.argv[1:]):
+        sys.exit("Usage: python benchmark.py [pages ...]")
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+
+    print(f"{'pages':>9} {'function':<38} {'time (s)':>10} {'pages/s':>12} {'peak (MB)':>10} {'L1 error':>10}")
+    for n in sizes:
+        for name, seconds, peak, error in run(n):
+            error = f"{error:10.2e}" if error is not None else f"{'-':>10}"
+            print(f"{n:>9} {name:<38} {seconds:10.3f} {n / seconds:12.0f} {peak / 2 ** 20:10.1f} {error}")
+
+
+def power_law_graph(n, links=LINKS, exponent=EXPONENT, seed=None):
+    """
+    Generate a random link graph of `n` pages whose out-degrees and
+    in-degrees both follow a power law with the given `exponent`, with
+    about `links` links per page on average.
+
+    Every page links to at least one other page. Return the link matrix,
+    as `pagerank.link_matrix` would.
+    """
+    rng = np.random.default_rng(seed)
+
+    #out-degrees from a Zipf distribution, scaled to the average number of links
+    degree = rng.zipf(exponent, size=n).astype(float)
+    degree = np.clip(np.round(degree * links / degree.mean()), 1, n - 1).astype(np.int64)
+
+    #destinations are chosen with probability proportional to a power-law weight
+    weight = rng.pareto(exponent - 1, size=n) + 1
+    sources = np.repeat(np.arange(n), degree)
+    destinations = rng.choice(n, size=len(sources), p=weight / weight.sum())
+
+    #replace links to the page itself with a link to the next page
+    self_links = destinations == sources
+    destinations[self_links] = (sources[self_links] + 1) % n
+
+    #drop duplicate links
+    edges = np.unique(sources * n + destinations)
+    sources, destinations = edges // n, edges % n
+
+    #zero-padded names keep the page ids in sorted order
+    pages = [f"{i:0{len(str(n - 1))}}.html" for i in range(n)]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return pages, indptr, destinations
+
+
+def power_law_corpus(n, links=LINKS, exponent=EXPONENT, seed=None):
+    """
+    Generate a random corpus like `power_law_graph`, as a dictionary like
+    `pagerank.crawl` returns.
+    """
+    pages, indptr, indices = power_law_graph(n, links, exponent, seed)
+    return {
+        page: {pages[j] for j in indices[indptr[i]:indptr[i + 1]]}
+        for i, page in enumerate(pages)
+    }
+
+
+def write_corpus(corpus, directory):
+    """
+    Write `corpus` to `directory` as one HTML file per page, in the format
+    of the corpus directories.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for page, links in corpus.items():
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html lang=\"en\">\n    <head>\n        <title>{page}</title>\n    </head>\n")
+            f.write("    <body>\n        <ul>\n")
+            for link in sorted(links):
+                f.write(f"            <li><a href=\"{link}\">{link}</a></li>\n")
+            f.write("        </ul>\n    </body>\n</html>\n")
+
+
+def measure(function, *args):
+    """
+    Call `function` with `args` twice, once to time it and once to trace
+    its peak memory use (not counting worker processes).
+    Return a tuple (result, seconds, peak bytes).
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def l1_error(ranks, reference):
+    """
+    Return the L1 distance between dictionaries of PageRank values.
+    """
+    return sum(abs(ranks[page] - reference[page]) for page in reference)
+
+
+def run(n):
+    """
+    Benchmark crawling and ranking a random corpus of `n` pages.
+    Return a list of (function name, seconds, peak bytes, L1 error)
+    tuples, where the error is None for crawlers.
+    """
+    results = []
+    corpus = power_law_corpus(n, seed=n)
+    pages, indptr, indices = pagerank.link_matrix(corpus)
+    reference = dict(zip(pages, pagerank.power_iteration(indptr, indices, pagerank.DAMPING, 1e-12).tolist()))
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(corpus, os.path.join(directory, "corpus"))
+        if n <= SLOW_LIMIT * 10:
+            _, seconds, peak = measure(pagerank.crawl, os.path.join(directory, "corpus"))
+            results.append(("crawl", seconds, peak, None))
+        _, seconds, peak = measure(pagerank.crawl_index, os.path.join(directory, "corpus"), os.path.join(directory, "index"))
+        results.append(("crawl_index", seconds, peak, None))
+
+    samplers = [
+        ("sample_pagerank", pagerank.sample_pagerank, n <= SLOW_LIMIT),
+        ("sample_pagerank_fast", pagerank.sample_pagerank_fast, True),
+        ("sample_pagerank_batch", lambda *args: pagerank.sample_pagerank_batch(*args)[0], True),
+    ]
+    for name, function, enabled in samplers:
+        if enabled:
+            ranks, seconds, peak = measure(function, corpus, pagerank.DAMPING, pagerank.SAMPLES)
+            results.append((name, seconds, peak, l1_error(ranks, reference)))
+
+    if n <= SLOW_LIMIT:
+        ranks, seconds, peak = measure(pagerank.iterate_pagerank, corpus, pagerank.DAMPING)
+        results.append(("iterate_pagerank", seconds, peak, l1_error(ranks, reference)))
+    for method in pagerank.SOLVERS:
+        if method == "gauss-seidel" and n > SLOW_LIMIT * 100:
+            continue
+        ranks, seconds, peak = measure(pagerank.iterate_pagerank_sparse, corpus, pagerank.DAMPING, 1e-6, method)
+        results.append((f"iterate_pagerank_sparse[{method}]", seconds, peak, l1_error(ranks, reference)))
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,43 @@
+import mmap
+import multiprocessing
 import os
 import random
 import re
 import sys
+import time
 import copy
 import icecream
+import math
+import numpy as np
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# How far from the PageRank a random surfer may still be when its visits
+# start to count, and how many counted steps it takes per burn-in step
+BURN_IN_TOLERANCE = 1e-3
+STEPS_PER_BURN_IN = 10
+LINK_PATTERN = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
 
 def main():
 
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python pagerank.py corpus [index]")
+
+    #with an index, only re-parse pages changed since the last run
+    if len(sys.argv) == 3:
+        matrix, iterated = update_index(sys.argv[1], sys.argv[2], DAMPING)
+        ranks = sample_pagerank_fast(matrix, DAMPING, SAMPLES)
+        print(f"PageRank Results from Sampling (n = {SAMPLES})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        ranks = iterated
+        print(f"PageRank Results from Iteration")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        return
+
     corpus = crawl(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
@@ -51,6 +76,207 @@ def crawl(directory):
     return pages
 
 
+def extract_links(path):
+    """
+    Return the set of all links found in the HTML file at `path`.
+    The file is memory-mapped instead of read into a string.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return set()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+            return {
+                match.group(1).decode(errors="replace")
+                for match in LINK_PATTERN.finditer(contents)
+            }
+
+
+def crawl_index(directory, index, processes=None, chunksize=64):
+    """
+    Parse a directory of HTML pages like `crawl`, using a pool of
+    `processes` worker processes, and write the links to an on-disk
+    link index in directory `index`.
+
+    The index holds `pages.txt`, with one page name per line (the line
+    number being the page id), and `edges.bin`, the (source, destination)
+    page id pairs as 32-bit integers, sorted by source. Only the parsing
+    is streamed: links are written as each page is parsed, but the link
+    matrix returned is then read back from `edges.bin` in full (use
+    `iterate_pagerank_out_of_core` on the index for corpora whose links
+    do not fit in memory). For `update_index`, it also keeps the
+    modification time of every page in `mtimes.npy`, and the links to
+    pages missing from the corpus in `unresolved.txt`.
+
+    Return the link matrix of the corpus, as `load_link_index` would.
+    """
+    pages = sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html")
+    )
+    ids = {page: i for i, page in enumerate(pages)}
+
+    os.makedirs(index, exist_ok=True)
+    with open(os.path.join(index, "pages.txt"), "w") as f:
+        f.writelines(f"{page}\n" for page in pages)
+    #PageRank values of an earlier index do not belong to this one
+    if os.path.exists(os.path.join(index, "ranks.npy")):
+        os.remove(os.path.join(index, "ranks.npy"))
+
+    indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+    mtimes = np.zeros(len(pages), dtype=np.int64)
+    paths = [os.path.join(directory, page) for page in pages]
+    with multiprocessing.Pool(processes) as pool, \
+            open(os.path.join(index, "edges.bin"), "wb") as edges, \
+            open(os.path.join(index, "unresolved.txt"), "w") as unresolved:
+        #imap keeps the pages in order, so edges stay sorted by source
+        for source, links in enumerate(pool.imap(extract_links, paths, chunksize)):
+            mtimes[source] = os.stat(paths[source]).st_mtime_ns
+            links.discard(pages[source])
+            #only include links to other pages in the corpus
+            destinations = sorted(ids[link] for link in links if link in ids)
+            unresolved.writelines(
+                f"{source}\t{link}\n" for link in sorted(links)
+                if link not in ids and is_page_link(link)
+            )
+            edge = np.empty((len(destinations), 2), dtype=np.int32)
+            edge[:, 0] = source
+            edge[:, 1] = destinations
+            edge.tofile(edges)
+            indptr[source + 1] = indptr[source] + len(destinations)
+
+    np.save(os.path.join(index, "mtimes.npy"), mtimes)
+    indices = np.fromfile(os.path.join(index, "edges.bin"), dtype=np.int32)[1::2]
+    return pages, indptr, indices.astype(np.int64)
+
+
+def load_link_index(index):
+    """
+    Load the link index written by `crawl_index` from directory `index`.
+    Return the link matrix of the corpus, as `link_matrix` would.
+    """
+    with open(os.path.join(index, "pages.txt")) as f:
+        pages = f.read().splitlines()
+
+    edges = np.fromfile(os.path.join(index, "edges.bin"), dtype=np.int32).reshape(-1, 2)
+    indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(edges[:, 0], minlength=len(pages)), out=indptr[1:])
+
+    return pages, indptr, edges[:, 1].astype(np.int64)
+
+
+def is_page_link(link):
+    """
+    Return True if `link` could name a page of a corpus directory.
+    """
+    return link.endswith(".html") and "/" not in link
+
+
+def update_index(directory, index, damping_factor, processes=None):
+    """
+    Bring the link index in directory `index` up to date with the HTML
+    pages in `directory`, and recompute PageRank values.
+
+    Only pages added or modified (by modification time) since the index
+    was written are parsed again; the edges of every other page are kept,
+    and links to removed or added pages are patched in. Iteration starts
+    from the PageRank values saved by the last update, so small changes
+    converge in a few sweeps. Without an index, crawl the whole corpus.
+
+    Return a tuple (matrix, ranks) of the updated link matrix, and a
+    dictionary of PageRank values like `iterate_pagerank` returns.
+    """
+    if not os.path.exists(os.path.join(index, "mtimes.npy")):
+        matrix = crawl_index(directory, index, processes)
+        rank = power_iteration(matrix[1], matrix[2], damping_factor)
+        np.save(os.path.join(index, "ranks.npy"), rank)
+        return matrix, dict(zip(matrix[0], rank.tolist()))
+
+    old_pages, _, _ = load_link_index(index)
+    old_edges = np.fromfile(os.path.join(index, "edges.bin"), dtype=np.int32).reshape(-1, 2)
+    old_mtimes = np.load(os.path.join(index, "mtimes.npy"))
+    old_ranks = np.load(os.path.join(index, "ranks.npy")) if os.path.exists(os.path.join(index, "ranks.npy")) else None
+    with open(os.path.join(index, "unresolved.txt")) as f:
+        old_unresolved = [line.rstrip("\n").split("\t", 1) for line in f]
+
+    pages = sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html")
+    )
+    ids = {page: i for i, page in enumerate(pages)}
+    mtimes = np.array([os.stat(os.path.join(directory, page)).st_mtime_ns for page in pages], dtype=np.int64)
+
+    #old id of every page, and new id of every old page (-1 if removed)
+    old_ids = {page: i for i, page in enumerate(old_pages)}
+    previous = np.array([old_ids.get(page, -1) for page in pages], dtype=np.int64)
+    renumber = np.array([ids.get(page, -1) for page in old_pages], dtype=np.int64)
+
+    #pages whose links are known from the old index
+    unchanged = previous >= 0
+    unchanged[unchanged] = old_mtimes[previous[unchanged]] == mtimes[unchanged]
+    kept = np.zeros(len(old_pages), dtype=bool)
+    kept[previous[unchanged]] = True
+
+    edges = []
+    unresolved = []
+
+    #old links of unchanged pages, to pages which may have been removed
+    old_edges = old_edges[kept[old_edges[:, 0]]]
+    sources = renumber[old_edges[:, 0]]
+    destinations = renumber[old_edges[:, 1]]
+    edges.append(np.column_stack((sources, destinations))[destinations >= 0])
+    unresolved.extend(
+        (source, old_pages[destination])
+        for source, destination in zip(sources[destinations < 0].tolist(), old_edges[destinations < 0, 1].tolist())
+    )
+
+    #old links of unchanged pages to missing pages, which may have been added
+    for source, link in old_unresolved:
+        source = int(source)
+        if kept[source]:
+            if link in ids:
+                edges.append(np.array([[renumber[source], ids[link]]]))
+            else:
+                unresolved.append((int(renumber[source]), link))
+
+    #parse added and modified pages again
+    changed = np.flatnonzero(~unchanged).tolist()
+    paths = [os.path.join(directory, pages[source]) for source in changed]
+    with multiprocessing.Pool(processes) as pool:
+        for source, links in zip(changed, pool.map(extract_links, paths)):
+            links.discard(pages[source])
+            edges.append(np.array([[source, ids[link]] for link in links if link in ids], dtype=np.int64).reshape(-1, 2))
+            unresolved.extend(
+                (source, link) for link in links
+                if link not in ids and is_page_link(link)
+            )
+
+    edges = np.concatenate(edges).astype(np.int32)
+    edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+    unresolved.sort()
+
+    with open(os.path.join(index, "pages.txt"), "w") as f:
+        f.writelines(f"{page}\n" for page in pages)
+    edges.tofile(os.path.join(index, "edges.bin"))
+    np.save(os.path.join(index, "mtimes.npy"), mtimes)
+    with open(os.path.join(index, "unresolved.txt"), "w") as f:
+        f.writelines(f"{source}\t{link}\n" for source, link in unresolved)
+
+    indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(edges[:, 0], minlength=len(pages)), out=indptr[1:])
+    indices = edges[:, 1].astype(np.int64)
+
+    #warm start from the last PageRank values, new pages start at 1/N;
+    #values saved for a different index are ignored
+    start = np.full(len(pages), 1 / len(pages))
+    if old_ranks is not None and len(old_ranks) == len(old_pages):
+        start[renumber[renumber >= 0]] = old_ranks[renumber >= 0]
+        start /= start.sum()
+
+    rank = power_iteration(indptr, indices, damping_factor, start=start)
+    np.save(os.path.join(index, "ranks.npy"), rank)
+    return (pages, indptr, indices), dict(zip(pages, rank.tolist()))
+
+
 def transition_model(corpus, page, damping_factor):
     """
     Return a probability distribution over which page to visit next,
@@ -175,5 +401,452 @@ def iterate_pagerank(corpus, damping_factor):
     return PageRank
 
 
+def link_matrix(corpus):
+    """
+    Build a compressed sparse row (CSR) link matrix out of `corpus`.
+
+    Return a tuple (pages, indptr, indices) where `pages` is a sorted list
+    of page names, and the pages linked to by page `pages[i]` are the ids
+    stored in `indices[indptr[i]:indptr[i + 1]]`. If `corpus` already is
+    such a link matrix (e.g. from `load_link_index`), return it as is.
+    """
+    if not isinstance(corpus, dict):
+        return corpus
+
+    pages = sorted(corpus)
+    ids = {page: i for i, page in enumerate(pages)}
+
+    indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+    indices = []
+    for i, page in enumerate(pages):
+        #links outside of the corpus and links to itself are not counted
+        links = sorted(ids[link] for link in corpus[page] if link in ids and link != page)
+        indices.extend(links)
+        indptr[i + 1] = indptr[i] + len(links)
+
+    return pages, indptr, np.array(indices, dtype=np.int64)
+
+
+def power_iteration(indptr, indices, damping_factor, tolerance=1e-6, max_iterations=1000, start=None,
+                    residuals=None):
+    """
+    Run PageRank power (Jacobi) iteration over a CSR link matrix, starting
+    from rank vector `start` (uniform 1/N if not given).
+
+    Pages with no links are treated as linking to every page, which is
+    applied as a rank-one correction instead of adding the links to the
+    matrix. Stop once the L1 distance between two successive rank vectors
+    drops below `tolerance`, appending that distance for every iteration
+    to list `residuals` if given. Return the rank vector as a NumPy array.
+    """
+    n = len(indptr) - 1
+    out_degree = np.diff(indptr)
+    sources = np.repeat(np.arange(n), out_degree)
+    dangling = out_degree == 0
+
+    rank = np.full(n, 1 / n) if start is None else np.asarray(start, dtype=float)
+    for _ in range(max_iterations):
+        #share of the rank every page passes through each of its links
+        share = np.divide(rank, out_degree, out=np.zeros(n), where=~dangling)
+        new_rank = np.bincount(indices, weights=share[sources], minlength=n)
+        new_rank = damping_factor * (new_rank + rank[dangling].sum() / n) + (1 - damping_factor) / n
+
+        change = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if residuals is not None:
+            residuals.append(change)
+        if change < tolerance:
+            break
+
+    return rank
+
+
+def gauss_seidel_iteration(indptr, indices, damping_factor, tolerance=1e-6, max_iterations=1000, start=None,
+                           residuals=None):
+    """
+    Run PageRank Gauss-Seidel iteration over a CSR link matrix, taking the
+    same arguments as `power_iteration`.
+
+    Pages are updated one at a time, in place, so later pages of a sweep
+    already see the new values of earlier ones. The rank vector is scaled
+    back to sum to 1 after every sweep.
+    """
+    n = len(indptr) - 1
+    out_degree = np.diff(indptr)
+    sources = np.repeat(np.arange(n), out_degree)
+
+    #incoming links of every page, as lists for the per-page loop
+    order = np.argsort(indices, kind="stable")
+    in_ptr = np.concatenate(([0], np.cumsum(np.bincount(indices, minlength=n)))).tolist()
+    in_sources = sources[order].tolist()
+    out_degree = out_degree.tolist()
+
+    rank = (np.full(n, 1 / n) if start is None else np.asarray(start, dtype=float)).tolist()
+    share = [r / d if d else 0 for r, d in zip(rank, out_degree)]
+    dangling_mass = sum(r for r, d in zip(rank, out_degree) if not d)
+    teleport = (1 - damping_factor) / n
+
+    for _ in range(max_iterations):
+        previous = rank.copy()
+        for page in range(n):
+            incoming = sum(share[source] for source in in_sources[in_ptr[page]:in_ptr[page + 1]])
+            value = teleport + damping_factor * (incoming + dangling_mass / n)
+            if out_degree[page]:
+                share[page] = value / out_degree[page]
+            else:
+                dangling_mass += value - rank[page]
+            rank[page] = value
+
+        total = sum(rank)
+        rank = [r / total for r in rank]
+        share = [r / d if d else 0 for r, d in zip(rank, out_degree)]
+        dangling_mass = sum(r for r, d in zip(rank, out_degree) if not d)
+
+        change = sum(abs(r - p) for r, p in zip(rank, previous))
+        if residuals is not None:
+            residuals.append(change)
+        if change < tolerance:
+            break
+
+    return np.array(rank)
+
+
+def adaptive_iteration(indptr, indices, damping_factor, tolerance=1e-6, max_iterations=1000, start=None,
+                       residuals=None):
+    """
+    Run adaptive PageRank iteration over a CSR link matrix, taking the same
+    arguments as `power_iteration`.
+
+    Like power iteration, but pages whose value changed by less than
+    `tolerance / N` in two sweeps in a row are frozen, and only the incoming links of
+    pages still changing are summed in later sweeps. Once those converge,
+    every page is thawed for a last check before stopping.
+    """
+    n = len(indptr) - 1
+    out_degree = np.diff(indptr)
+    dangling = out_degree == 0
+    sources = np.repeat(np.arange(n), out_degree)
+
+    #edges sorted by destination, so the edges into active pages are slices
+    order = np.argsort(indices, kind="stable")
+    sources = sources[order]
+    destinations = indices[order]
+
+    rank = np.full(n, 1 / n) if start is None else np.asarray(start, dtype=float).copy()
+    active = np.ones(n, dtype=bool)
+    settled = np.zeros(n, dtype=bool)
+    edges = np.arange(len(destinations))
+    for _ in range(max_iterations):
+        share = np.divide(rank, out_degree, out=np.zeros(n), where=~dangling)
+        incoming = np.bincount(destinations[edges], weights=share[sources[edges]], minlength=n)
+        new_rank = damping_factor * (incoming + rank[dangling].sum() / n) + (1 - damping_factor) / n
+
+        delta = np.zeros(n)
+        delta[active] = np.abs(new_rank[active] - rank[active])
+        rank[active] = new_rank[active]
+
+        change = delta.sum()
+        if residuals is not None:
+            residuals.append(change)
+        if change < tolerance:
+            if active.all():
+                break
+            #frozen pages may have drifted since, so check every page once more
+            active[:] = True
+            edges = np.arange(len(destinations))
+            continue
+
+        #freeze pages converged two sweeps in a row, keeping the edges into the rest
+        small = active & (delta < tolerance / n)
+        converged = small & settled
+        settled = small
+        if converged.any():
+            active &= ~converged
+            edges = np.flatnonzero(active[destinations])
+
+    return rank / rank.sum()
+
+
+SOLVERS = {
+    "jacobi": power_iteration,
+    "gauss-seidel": gauss_seidel_iteration,
+    "adaptive": adaptive_iteration,
+}
+
+
+def solve_pagerank(corpus, damping_factor, method="jacobi", tolerance=1e-6, max_iterations=1000, start=None):
+    """
+    Return PageRank values for each page using solver `method`, one of
+    "jacobi", "gauss-seidel" or "adaptive".
+
+    Return a tuple (ranks, telemetry) where `ranks` is a dictionary like
+    `iterate_pagerank` returns, and `telemetry` a dictionary with the
+    solver `method`, the number of `iterations`, the L1 `residuals` of
+    every iteration and the wall-clock `time` in seconds.
+    """
+    if method not in SOLVERS:
+        raise ValueError(f"unknown solver {method!r}")
+
+    pages, indptr, indices = link_matrix(corpus)
+    residuals = []
+    start_time = time.perf_counter()
+    rank = SOLVERS[method](indptr, indices, damping_factor, tolerance, max_iterations, start, residuals)
+    elapsed = time.perf_counter() - start_time
+
+    telemetry = {
+        "method": method,
+        "iterations": len(residuals),
+        "residuals": [float(residual) for residual in residuals],
+        "time": elapsed,
+    }
+    return dict(zip(pages, rank.tolist())), telemetry
+
+
+def sample_pagerank_fast(corpus, damping_factor, n):
+    """
+    Return PageRank values for each page like `sample_pagerank`, but
+    drawing every step in O(1) from tables precomputed once per corpus.
+
+    Every page's transition model is a mix of two uniform distributions
+    (its own links, and the whole corpus), so the only table needed per
+    page is where its links start in the CSR link matrix and how many
+    there are.
+    """
+    pages, indptr, indices = link_matrix(corpus)
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    total = len(pages)
+
+    visits = [0] * total
+    sample = random.randrange(total)
+    visits[sample] += 1
+    for _ in range(n - 1):
+        start = indptr[sample]
+        degree = indptr[sample + 1] - start
+        #follow one of the links, or jump anywhere if page has no links
+        if degree and random.random() < damping_factor:
+            sample = indices[start + random.randrange(degree)]
+        else:
+            sample = random.randrange(total)
+        visits[sample] += 1
+
+    return {page: count / n for page, count in zip(pages, visits)}
+
+
+def sample_pagerank_batch(corpus, damping_factor, n, walkers=1000, groups=20, seed=None):
+    """
+    Return PageRank values for each page by sampling about `n` pages with
+    up to `walkers` independent random surfers, all moved at once per
+    NumPy step.
+
+    Surfers start on uniformly random pages, which biases their first
+    visits towards the uniform distribution: after t steps a surfer is
+    still up to `damping_factor` ** t away from the PageRank. So the first
+    ceil(log(BURN_IN_TOLERANCE) / log(damping_factor)) steps (43 for 0.85)
+    are not counted, and fewer surfers are used if needed so that each
+    takes at least `STEPS_PER_BURN_IN` counted steps per burn-in step.
+    The burn-in steps come on top of the `n` samples.
+
+    Walkers are split into `groups` batches whose visit frequencies are
+    independent estimates of the PageRank, used to get a 95% confidence
+    interval. Return a tuple (ranks, errors) of dictionaries mapping page
+    names to the estimated PageRank and to the half-width of its interval.
+    """
+    pages, indptr, indices = link_matrix(corpus)
+    total = len(pages)
+    out_degree = np.diff(indptr)
+    rng = np.random.default_rng(seed)
+
+    if 0 < damping_factor < 1:
+        burn_in = math.ceil(math.log(BURN_IN_TOLERANCE) / math.log(damping_factor))
+    else:
+        burn_in = 0
+    walkers = min(walkers, n, n // max(1, STEPS_PER_BURN_IN * burn_in))
+    walkers = max(groups, walkers)
+    steps = -(-n // walkers)
+    group = np.arange(walkers) % groups * total
+
+    position = rng.integers(total, size=walkers)
+    visits = np.zeros(groups * total, dtype=np.int64)
+    for step in range(burn_in + steps):
+        if step:
+            degree = out_degree[position]
+            #walkers that follow a link, the rest jumps to a random page
+            follow = (degree > 0) & (rng.random(walkers) < damping_factor)
+            link = indptr[position[follow]] + (rng.random(follow.sum()) * degree[follow]).astype(np.int64)
+            position = rng.integers(total, size=walkers)
+            position[follow] = indices[link]
+        if step >= burn_in:
+            visits += np.bincount(group + position, minlength=groups * total)
+
+    #visit frequencies of each group of walkers
+    frequencies = visits.reshape(groups, total) / np.bincount(group // total, minlength=groups)[:, None] / steps
+    rank = visits.reshape(groups, total).sum(axis=0) / (walkers * steps)
+    error = 1.96 * frequencies.std(axis=0, ddof=1) / np.sqrt(groups)
+
+    return dict(zip(pages, rank.tolist())), dict(zip(pages, error.tolist()))
+
+
+def personalized_pagerank(corpus, damping_factor, seeds, tolerance=1e-6, max_iterations=1000):
+    """
+    Return personalized PageRank values for many teleport vectors at once.
+
+    `seeds` maps a name (e.g. a topic or a user) to the set of pages the
+    random surfer jumps to instead of a page chosen from the whole corpus.
+    Surfers on pages with no links also jump to the seed pages. All the
+    vectors are solved together, as one power iteration on an N x K rank
+    matrix over the same link matrix, until every column moved less than
+    `tolerance` (L1 distance).
+
+    Return a dictionary mapping every name in `seeds` to a dictionary of
+    PageRank values like `iterate_pagerank` returns.
+    """
+    pages, indptr, indices = link_matrix(corpus)
+    ids = {page: i for i, page in enumerate(pages)}
+    n = len(pages)
+    names = list(seeds)
+
+    #teleport matrix, one column per seed set
+    teleport = np.zeros((n, len(names)))
+    for column, name in enumerate(names):
+        seed = [ids[page] for page in seeds[name]]
+        if not seed:
+            raise ValueError(f"no seed pages for {name!r}")
+        teleport[seed, column] = 1 / len(seed)
+
+    #edges sorted by destination, to sum each page's incoming shares
+    out_degree = np.diff(indptr)
+    dangling = out_degree == 0
+    sources = np.repeat(np.arange(n), out_degree)
+    order = np.argsort(indices, kind="stable")
+    sources = sources[order]
+    in_degree = np.bincount(indices, minlength=n)
+    linked = np.flatnonzero(in_degree)
+    starts = (np.cumsum(in_degree) - in_degree)[linked]
+
+    rank = teleport.copy()
+    for _ in range(max_iterations):
+        share = rank / np.maximum(out_degree, 1)[:, None]
+        new_rank = np.zeros_like(rank)
+        if len(sources):
+            new_rank[linked] = np.add.reduceat(share[sources], starts, axis=0)
+        new_rank = damping_factor * new_rank + (damping_factor * rank[dangling].sum(axis=0) + 1 - damping_factor) * teleport
+
+        change = np.abs(new_rank - rank).sum(axis=0).max()
+        rank = new_rank
+        if change < tolerance:
+            break
+
+    return {
+        name: dict(zip(pages, rank[:, column].tolist()))
+        for column, name in enumerate(names)
+    }
+
+
+def iterate_pagerank_sparse(corpus, damping_factor, tolerance=1e-6, method="jacobi"):
+    """
+    Return PageRank values for each page like `iterate_pagerank`, but by
+    building a sparse link matrix once and running vectorized power
+    iteration on it (or another of the `SOLVERS`), which scales to
+    corpora of hundreds of thousands of pages.
+    """
+    ranks, _ = solve_pagerank(corpus, damping_factor, method, tolerance)
+    return ranks
+
+
+def sort_link_index(index, block_size=1 << 20):
+    """
+    Write the edges of the link index in directory `index` sorted by
+    destination, to memory-mapped NumPy file `edges_by_destination.npy`.
+
+    Edges are counting-sorted `block_size` at a time, so at most one block
+    of edges and a few arrays of one value per page are held in memory.
+    Return the out-degree of every page as a NumPy array.
+    """
+    with open(os.path.join(index, "pages.txt")) as f:
+        n = sum(1 for _ in f)
+
+    #an empty file cannot be memory-mapped, and there is nothing to sort
+    edges_path = os.path.join(index, "edges.bin")
+    if os.path.getsize(edges_path) == 0:
+        np.save(os.path.join(index, "edges_by_destination.npy"), np.zeros((0, 2), dtype=np.int32))
+        return np.zeros(n, dtype=np.int64)
+    edges = np.memmap(edges_path, dtype=np.int32, mode="r").reshape(-1, 2)
+
+    #first pass counts the links out of and into every page
+    out_degree = np.zeros(n, dtype=np.int64)
+    in_degree = np.zeros(n, dtype=np.int64)
+    for start in range(0, len(edges), block_size):
+        block = np.asarray(edges[start:start + block_size])
+        out_degree += np.bincount(block[:, 0], minlength=n)
+        in_degree += np.bincount(block[:, 1], minlength=n)
+
+    #second pass moves every edge to the next free slot of its destination
+    sorted_edges = np.lib.format.open_memmap(
+        os.path.join(index, "edges_by_destination.npy"), mode="w+", dtype=np.int32, shape=edges.shape
+    )
+    free = np.cumsum(in_degree) - in_degree
+    for start in range(0, len(edges), block_size):
+        block = np.asarray(edges[start:start + block_size])
+        block = block[np.argsort(block[:, 1], kind="stable")]
+        destinations, first, counts = np.unique(block[:, 1], return_index=True, return_counts=True)
+        offset = np.arange(len(block)) - np.repeat(first, counts)
+        sorted_edges[free[block[:, 1]] + offset] = block
+        free[destinations] += counts
+    sorted_edges.flush()
+
+    return out_degree
+
+
+def iterate_pagerank_out_of_core(index, damping_factor, tolerance=1e-6, max_iterations=1000, block_size=1 << 20):
+    """
+    Return PageRank values for each page of the link index in directory
+    `index` like `iterate_pagerank_sparse`, without loading the edges into
+    memory.
+
+    Power iteration streams over the edges, memory-mapped and sorted by
+    destination, `block_size` at a time, so each block only adds to a
+    contiguous range of the new rank vector. The sorted edges are written
+    by `sort_link_index` the first time, or when the index has changed.
+    Without any links, every page gets the same rank.
+    """
+    with open(os.path.join(index, "pages.txt")) as f:
+        pages = f.read().splitlines()
+    n = len(pages)
+    if os.path.getsize(os.path.join(index, "edges.bin")) == 0:
+        return {page: 1 / n for page in pages}
+
+    sorted_path = os.path.join(index, "edges_by_destination.npy")
+    if (not os.path.exists(sorted_path)
+            or os.path.getmtime(sorted_path) < os.path.getmtime(os.path.join(index, "edges.bin"))):
+        out_degree = sort_link_index(index, block_size)
+    else:
+        out_degree = None
+
+    edges = np.load(sorted_path, mmap_mode="r")
+    if out_degree is None:
+        out_degree = np.zeros(n, dtype=np.int64)
+        for start in range(0, len(edges), block_size):
+            out_degree += np.bincount(edges[start:start + block_size, 0], minlength=n)
+    dangling = out_degree == 0
+
+    rank = np.full(n, 1 / n)
+    for _ in range(max_iterations):
+        share = np.divide(rank, out_degree, out=np.zeros(n), where=~dangling)
+        new_rank = np.zeros(n)
+        for start in range(0, len(edges), block_size):
+            block = np.asarray(edges[start:start + block_size])
+            low, high = block[0, 1], block[-1, 1] + 1
+            new_rank[low:high] += np.bincount(block[:, 1] - low, weights=share[block[:, 0]], minlength=high - low)
+        new_rank = damping_factor * (new_rank + rank[dangling].sum() / n) + (1 - damping_factor) / n
+
+        change = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if change < tolerance:
+            break
+
+    return dict(zip(pages, rank.tolist()))
+
+
 if __name__ == "__main__":
     main()